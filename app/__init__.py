@@ -6,6 +6,8 @@ from app.routes.auth_routes import auth_bp
 from app.routes.annotator_routes import annotator_bp
 from app.routes.reviewer_routes import reviewer_bp
 from app.routes.interface_routes import interface_bp
+from app.visualization import visualization_cache, render_pool
+from app.jobs import job_runner
 from flask_mail import Mail
 
 
@@ -18,6 +20,9 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    visualization_cache.init_app(app)
+    render_pool.init_app(app)
+    job_runner.init_app(app)
 
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
@@ -0,0 +1,501 @@
+"""Bulk import of USR corpus files.
+
+A corpus file holds any number of ``<segment_id=...> ... </segment_id>``
+blocks in the 9-column format accepted by ``create_usr``. The file is read
+line by line and parsed one block at a time, so memory use is bounded by the
+chunk size rather than the file size. Blocks are resolved to their segments
+by the ``segment_id`` label and written in chunks: each chunk resolves its
+segments with one query, inserts its USRs with one multi-row
+``INSERT ... RETURNING`` and each layer with one executemany, then commits.
+A failing chunk is rolled back on its own, without losing the chunks before
+it.
+
+Imports are idempotent. Every imported USR stores a ``source_hash`` of its
+block, so re-importing a corpus skips the blocks that did not change without
+touching the layer tables, and rewrites only those that did. Segments store
+a ``source_hash`` of their imported fields in the same way.
+"""
+
+import multiprocessing
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from types import SimpleNamespace
+
+from sqlalchemy import delete, insert, update
+
+from app.models import db, Chapter, Sentence, Segment, USR
+from app.models import (
+    LexicalInfo,
+    DependencyInfo,
+    DiscourseCorefInfo,
+    ConstructionInfo,
+    SentenceTypeInfo,
+)
+from app.progress import adjust_progress
+from app.usr_format import (
+    hash_usr_text,
+    parse_usr_lines,
+    render_usr_rows,
+    wrap_usr_rows,
+)
+
+USR_IMPORT_CHUNK_SIZE = 500
+# Blocks sent to a parser process at a time
+USR_PARSE_BATCH_SIZE = 64
+
+SEGMENT_FIELDS = ["segment_id", "text", "wxtext", "englishtext"]
+LAYER_MODELS = (
+    LexicalInfo,
+    DependencyInfo,
+    DiscourseCorefInfo,
+    ConstructionInfo,
+    SentenceTypeInfo,
+)
+
+
+def insert_returning_ids(model, rows):
+    """Insert ``rows`` with a multi-row INSERT ... RETURNING.
+
+    Returns the new primary keys in the order of ``rows``. Dialects that
+    cannot guarantee that order for a batch (SQLite) get one statement per
+    row from SQLAlchemy instead.
+    """
+    if not rows:
+        return []
+    return db.session.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True), rows
+    ).all()
+
+
+def _layer_rows(parsed):
+    """Layer rows of a parsed block, stored the same way ``create_usr`` does."""
+
+    def optional_str(value):
+        return str(value) if value is not None else None
+
+    return {
+        LexicalInfo: [
+            {
+                "concept": item["concept"],
+                "index": item["index"],
+                "semantic_category": item.get("semantic_category"),
+                "morpho_semantic": item.get("morpho_semantic"),
+                "speakers_view": item.get("speakers_view"),
+            }
+            for item in parsed.get("lexical_info", [])
+        ],
+        DependencyInfo: [
+            {
+                "concept": item["concept"],
+                "index": item["index"],
+                "head_index": optional_str(item["head_index"]),
+                "relation": item["relation"],
+            }
+            for item in parsed.get("dependency_info", [])
+        ],
+        DiscourseCorefInfo: [
+            {
+                "concept": item["concept"],
+                "index": item["index"],
+                "head_index": optional_str(item["head_index"]),
+                "relation": item["relation"],
+            }
+            for item in parsed.get("discourse_coref_info", [])
+        ],
+        ConstructionInfo: [
+            {
+                "concept": item["concept"],
+                "index": item["index"],
+                "cxn_index": optional_str(item["cxn_index"]),
+                "component_type": item["component_type"],
+            }
+            for item in parsed.get("construction_info", [])
+        ],
+        SentenceTypeInfo: [
+            {
+                "sentence_type": parsed["sentence_type"],
+                "scope": (parsed.get("sentence_type_info") or {}).get("scope"),
+            }
+        ],
+    }
+
+
+def _render(layers):
+    """Materialized concept rows, rendered without touching the DB."""
+
+    def rows(model):
+        return [SimpleNamespace(**row) for row in layers[model]]
+
+    return "\n".join(
+        render_usr_rows(
+            rows(LexicalInfo),
+            rows(DependencyInfo),
+            rows(DiscourseCorefInfo),
+            rows(ConstructionInfo),
+            rows(SentenceTypeInfo),
+        )
+    )
+
+
+def segment_source_hash(segment):
+    """Hash of the imported fields of a segment, given as a dict."""
+    values = (
+        "" if segment[field] is None else str(segment[field])
+        for field in SEGMENT_FIELDS
+    )
+    return hash_usr_text("\t".join(values))
+
+
+def _usr_values(segment, parsed):
+    """USR columns for a prepared USR on ``segment``, including its hashes."""
+    block = wrap_usr_rows(parsed["rendered_text"], segment)
+    return {
+        "sentence_type": parsed["sentence_type"],
+        "rendered_text": parsed["rendered_text"],
+        "content_hash": hash_usr_text(block),
+        # Unlike the rendered rows, the source hash covers the sentence type
+        "source_hash": hash_usr_text(f"{block}\n%{parsed['sentence_type']}"),
+    }
+
+
+def _compare(usr, values):
+    """``"unchanged"``, ``"changed"`` or ``"edited"`` for a USR and a new block."""
+    if usr.source_hash is not None:
+        return "unchanged" if usr.source_hash == values["source_hash"] else "changed"
+    # Written before source hashes, so a difference may be an annotator's
+    # edit rather than a new block; rewriting it would discard their work
+    if usr.content_hash is not None and usr.content_hash == values["content_hash"]:
+        return "unchanged"
+    return "edited"
+
+
+def _insert_layers(usr_ids, layers):
+    for model in LAYER_MODELS:
+        rows = [
+            {"usr_id": usr_id, **row}
+            for usr_id, usr_layers in zip(usr_ids, layers)
+            for row in usr_layers[model]
+        ]
+        if rows:
+            # render_nulls keeps rows with empty columns in one batch
+            db.session.execute(insert(model).execution_options(render_nulls=True), rows)
+
+
+def sync_usrs(items):
+    """Create, rewrite or skip the USRs of ``(segment, parsed)`` pairs.
+
+    ``segment`` needs ``id``, ``segment_id`` and ``text``; ``parsed`` comes
+    from prepare_usr or parse_usr_block. A segment without a USR gets a new
+    one. If its USR was imported from the same block it is left untouched,
+    otherwise its layers are replaced; status and assignments are kept.
+    Segments with more than one USR are skipped, as are USRs written before
+    source hashes whose content no longer matches the block, since they may
+    have been edited. Nothing is committed.
+
+    Returns a ``(status, detail)`` pair per item, in order: ``("created",
+    usr_id)``, ``("updated", usr_id)``, ``("unchanged", usr_id)`` or
+    ``("skipped", reason)``.
+    """
+    existing = {}
+    for row in db.session.query(
+        USR.id, USR.segment_id, USR.source_hash, USR.content_hash
+    ).filter(USR.segment_id.in_({segment.id for segment, _ in items})):
+        existing.setdefault(row.segment_id, []).append(row)
+
+    results = [None] * len(items)
+    created, rewritten = [], []  # (position, usr_id or segment id, values, layers)
+    for i, (segment, parsed) in enumerate(items):
+        values = _usr_values(segment, parsed)
+        usrs = existing.get(segment.id, [])
+        if not usrs:
+            created.append((i, segment.id, values, parsed["layers"]))
+        elif len(usrs) > 1:
+            results[i] = ("skipped", "segment has more than one USR")
+        else:
+            state = _compare(usrs[0], values)
+            if state == "unchanged":
+                results[i] = ("unchanged", usrs[0].id)
+            elif state == "edited":
+                results[i] = ("skipped", "edited since import")
+            else:
+                rewritten.append((i, usrs[0].id, values, parsed["layers"]))
+
+    if created:
+        usr_ids = insert_returning_ids(
+            USR,
+            [
+                {"segment_id": segment_id, "status": "Pending", **values}
+                for _, segment_id, values, _ in created
+            ],
+        )
+        _insert_layers(usr_ids, [layers for _, _, _, layers in created])
+        for (i, _, _, _), usr_id in zip(created, usr_ids):
+            results[i] = ("created", usr_id)
+
+    if rewritten:
+        usr_ids = [usr_id for _, usr_id, _, _ in rewritten]
+        for model in LAYER_MODELS:
+            db.session.execute(delete(model).where(model.usr_id.in_(usr_ids)))
+        db.session.execute(
+            update(USR),
+            [{"id": usr_id, **values} for _, usr_id, values, _ in rewritten],
+        )
+        db.session.execute(
+            update(USR)
+            .where(USR.id.in_(usr_ids))
+            .values(version=USR.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        _insert_layers(usr_ids, [layers for _, _, _, layers in rewritten])
+        for i, usr_id, _, _ in rewritten:
+            results[i] = ("updated", usr_id)
+
+    return results
+
+
+def _resolve_segments(labels, chapter_id=None, project_id=None):
+    """Map each ``segment_id`` label to the matching segment rows."""
+    query = (
+        db.session.query(
+            Segment.id,
+            Segment.segment_id,
+            Segment.text,
+            Chapter.id.label("chapter_id"),
+            Chapter.project_id,
+        )
+        .join(Sentence, Segment.sentence_id == Sentence.id)
+        .join(Chapter, Sentence.chapter_id == Chapter.id)
+        .filter(Segment.segment_id.in_(labels))
+    )
+    if chapter_id is not None:
+        query = query.filter(Chapter.id == chapter_id)
+    if project_id is not None:
+        query = query.filter(Chapter.project_id == project_id)
+
+    segments = {}
+    for row in query:
+        segments.setdefault(row.segment_id, []).append(row)
+    return segments
+
+
+def prepare_usr(data):
+    """Layer rows and rendered rows of a USR given like parse_usr_lines output.
+
+    The sentence type defaults to "declarative", as in ``create_usr``.
+    """
+    data = {"sentence_type": "declarative", **data}
+    layers = _layer_rows(data)
+    return {
+        "sentence_type": data["sentence_type"],
+        "layers": layers,
+        "rendered_text": _render(layers),
+    }
+
+
+def parse_usr_block(block):
+    """Parse, validate and render one UsrBlock; returns ``(parsed, error)``.
+
+    ``parsed`` holds the sentence type, the layer rows ready for insert and
+    the rendered concept rows, so that only database work is left for the
+    importer. It needs no app or database and can run in a worker process.
+    """
+    if block.error or not block.label:
+        return None, block.error or "missing segment_id"
+    try:
+        parsed = parse_usr_lines(block.lines)
+    except Exception as e:
+        return None, f"parse error: {e}"
+    if not parsed["lexical_info"]:
+        return None, "no concept rows"
+
+    return prepare_usr(parsed), None
+
+
+def _parse_usr_batch(blocks):
+    return [parse_usr_block(block) for block in blocks]
+
+
+_parse_pools = {}  # worker count -> ProcessPoolExecutor
+_parse_pools_lock = threading.Lock()
+
+
+def _get_parse_pool(workers):
+    """The process pool of ``workers`` processes, started on first use.
+
+    Imports asking for the same number of workers share a pool. Its
+    processes come from a forkserver rather than a fork of this process,
+    which by then runs render and job threads whose locks a fork would copy
+    in whatever state they are in.
+    """
+    with _parse_pools_lock:
+        if workers not in _parse_pools:
+            _parse_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return _parse_pools[workers]
+
+
+def _discard_parse_pool(workers, pool):
+    with _parse_pools_lock:
+        if _parse_pools.get(workers) is pool:
+            del _parse_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_usr_blocks(blocks, workers=1):
+    """Lazily parse UsrBlocks, yielding ``(block, parsed, error)`` in order.
+
+    With more than one worker, batches of USR_PARSE_BATCH_SIZE blocks are
+    parsed in a pool of that many processes while the caller writes earlier
+    results. At most two batches per worker are queued, so reading ahead of
+    the caller stays bounded.
+    """
+    if workers <= 1:
+        for block in blocks:
+            yield (block, *parse_usr_block(block))
+        return
+
+    blocks = iter(blocks)
+    pool = _get_parse_pool(workers)
+    in_flight = deque()
+    try:
+        while True:
+            while len(in_flight) < workers * 2:
+                batch = list(islice(blocks, USR_PARSE_BATCH_SIZE))
+                if not batch:
+                    break
+                in_flight.append((batch, pool.submit(_parse_usr_batch, batch)))
+
+            if not in_flight:
+                break
+
+            batch, future = in_flight.popleft()
+            for block, result in zip(batch, future.result()):
+                yield (block, *result)
+    except BrokenProcessPool:
+        # A worker died; the next import starts a fresh pool
+        _discard_parse_pool(workers, pool)
+        raise
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+def _import_chunk(chunk, seen_segments, chapter_id=None, project_id=None):
+    results = {}
+    pending = []  # (block, segment, parsed)
+
+    parsed_blocks = []
+    for block, parsed, error in chunk:
+        if error:
+            results[block.number] = ("failed", error)
+        else:
+            parsed_blocks.append((block, parsed))
+
+    segments = _resolve_segments(
+        {block.label for block, _ in parsed_blocks}, chapter_id, project_id
+    )
+
+    for block, parsed in parsed_blocks:
+        matches = segments.get(block.label, [])
+        if not matches:
+            results[block.number] = ("failed", "segment not found")
+        elif len(matches) > 1:
+            results[block.number] = (
+                "failed",
+                "segment_id is ambiguous, pass chapter_id or project_id",
+            )
+        elif matches[0].id in seen_segments:
+            results[block.number] = ("skipped", "duplicate block for segment")
+        else:
+            seen_segments.add(matches[0].id)
+            pending.append((block, matches[0], parsed))
+
+    if not pending:
+        return results
+
+    try:
+        synced = sync_usrs([(segment, parsed) for _, segment, parsed in pending])
+
+        per_chapter = Counter(
+            (segment.chapter_id, segment.project_id)
+            for (_, segment, _), (status, _) in zip(pending, synced)
+            if status == "created"
+        )
+        for (chapter, project), count in per_chapter.items():
+            adjust_progress(chapter, project, usrs=count)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for block, segment, _ in pending:
+            seen_segments.discard(segment.id)
+            results[block.number] = ("failed", f"database error: {e}")
+        return results
+
+    for (block, _, _), result in zip(pending, synced):
+        results[block.number] = result
+    return results
+
+
+def iter_usr_import(
+    blocks,
+    chapter_id=None,
+    project_id=None,
+    chunk_size=USR_IMPORT_CHUNK_SIZE,
+    workers=1,
+):
+    """Import UsrBlocks chunk by chunk, yielding each chunk's report entries.
+
+    Each block creates, rewrites or leaves alone its segment's USR as
+    described in sync_usrs. ``chapter_id`` / ``project_id`` restrict the
+    segments a ``segment_id`` label may resolve to. Blocks are parsed by
+    ``workers`` processes, while all database writes happen here. Little is
+    read from ``blocks`` beyond the chunk being written, so the caller can
+    report progress between chunks.
+    """
+    seen_segments = set()
+    parsed = parse_usr_blocks(blocks, workers)
+
+    while True:
+        chunk = list(islice(parsed, chunk_size))
+        if not chunk:
+            break
+
+        results = _import_chunk(chunk, seen_segments, chapter_id, project_id)
+        entries = []
+        for block, _, _ in chunk:
+            status, detail = results[block.number]
+            entry = {
+                "block": block.number,
+                "line": block.line,
+                "segment_id": block.label,
+                "status": status,
+            }
+            if status in ("created", "updated", "unchanged"):
+                entry["usr_id"] = detail
+            else:
+                entry["reason"] = detail
+            entries.append(entry)
+        yield entries
+
+
+def import_usr_blocks(blocks, **kwargs):
+    """Run ``iter_usr_import`` to completion; returns totals and all entries."""
+    report = {
+        "created": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "skipped": 0,
+        "failed": 0,
+        "blocks": [],
+    }
+    for entries in iter_usr_import(blocks, **kwargs):
+        for entry in entries:
+            report[entry["status"]] += 1
+        report["blocks"].extend(entries)
+    return report
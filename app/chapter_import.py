@@ -0,0 +1,323 @@
+"""One-shot import of a chapter with its sentences, segments and USRs.
+
+A chapter bundle is either JSON::
+
+    {
+        "name": "Chapter 3",
+        "sentences": [
+            {
+                "sentence_id": "Geo_nios_3ch_0002",
+                "text": "...",
+                "segments": [
+                    {"segment_id": "...", "text": "...", "wxtext": "...",
+                     "englishtext": "..."}
+                ]
+            }
+        ],
+        "usr_text": "<segment_id=...> ... </segment_id> ..."
+    }
+
+or a set of files: a sentences TSV (sentence_id, text), a segments TSV
+(sentence_id, segment_id, text, wxtext, englishtext) and a USR file whose
+blocks refer to the segments by segment_id.
+
+The whole bundle is validated before anything is written, then created in
+one transaction with a multi-row INSERT per table. If any part of it is
+invalid or fails to insert, nothing is created.
+
+Importing a bundle again for a chapter name the project already has syncs it
+into that chapter instead: sentences and segments are matched by their
+``sentence_id`` / ``segment_id`` labels, unchanged ones are left alone and
+only new or changed rows are written. Rows missing from the bundle are kept.
+Every sentence of such a bundle needs a ``sentence_id``.
+"""
+
+from collections import Counter
+from types import SimpleNamespace
+
+from sqlalchemy import update
+
+from app.bulk_import import (
+    SEGMENT_FIELDS,
+    insert_returning_ids,
+    parse_usr_block,
+    segment_source_hash,
+    sync_usrs,
+)
+from app.models import db, Chapter, Sentence, Segment
+from app.progress import recompute_progress
+from app.usr_format import iter_usr_blocks
+
+SENTENCE_TSV_COLUMNS = ["sentence_id", "text"]
+SEGMENT_TSV_COLUMNS = ["sentence_id", "segment_id", "text", "wxtext", "englishtext"]
+
+
+class ChapterImportError(Exception):
+    """The bundle is invalid; ``errors`` lists every problem found."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def read_tsv(lines, columns, source, errors):
+    """Read tab separated rows with exactly ``columns``, skipping blank lines."""
+    rows = []
+    for line_no, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        parts = [part.strip() for part in line.split("\t")]
+        if len(parts) != len(columns):
+            errors.append(
+                f"{source} line {line_no}: expected {len(columns)} columns "
+                f"({', '.join(columns)}), got {len(parts)}"
+            )
+            continue
+        rows.append(dict(zip(columns, parts)))
+    return rows
+
+
+def sentences_from_tsv(sentence_lines, segment_lines=None):
+    """Build the bundle's ``sentences`` list from the sentences/segments TSVs."""
+    errors = []
+    sentences = read_tsv(sentence_lines, SENTENCE_TSV_COLUMNS, "sentences", errors)
+    by_label = {}
+    for sentence in sentences:
+        sentence["segments"] = []
+        by_label.setdefault(sentence["sentence_id"], sentence)
+
+    if segment_lines is not None:
+        for segment in read_tsv(segment_lines, SEGMENT_TSV_COLUMNS, "segments", errors):
+            sentence = by_label.get(segment.pop("sentence_id"))
+            if sentence is None:
+                errors.append(
+                    f"segments: segment {segment['segment_id']} refers to an "
+                    f"unknown sentence_id"
+                )
+                continue
+            sentence["segments"].append(segment)
+
+    if errors:
+        raise ChapterImportError(errors)
+    return sentences
+
+
+def _validate(sentences, resync=False):
+    errors = []
+    labels = set()
+    if not sentences:
+        errors.append("the chapter has no sentences")
+
+    for i, sentence in enumerate(sentences, start=1):
+        if not isinstance(sentence, dict):
+            errors.append(f"sentence {i}: expected an object")
+            continue
+        if not sentence.get("text"):
+            errors.append(f"sentence {i}: text is required")
+        if resync and not sentence.get("sentence_id"):
+            # Unlabeled sentences could not be matched, so would be duplicated
+            errors.append(
+                f"sentence {i}: sentence_id is required to re-import into an "
+                f"existing chapter"
+            )
+        segments = sentence["segments"] = sentence.get("segments") or []
+        if not isinstance(segments, list):
+            errors.append(f"sentence {i}: segments must be a list")
+            continue
+        for j, segment in enumerate(segments, start=1):
+            if not isinstance(segment, dict):
+                errors.append(f"sentence {i} segment {j}: expected an object")
+                continue
+            missing = [field for field in SEGMENT_FIELDS if field not in segment]
+            if missing:
+                errors.append(f"sentence {i} segment {j}: missing {', '.join(missing)}")
+                continue
+            wrong = [
+                field
+                for field in SEGMENT_FIELDS
+                if not isinstance(segment[field], (str, type(None)))
+            ]
+            if wrong:
+                errors.append(
+                    f"sentence {i} segment {j}: {', '.join(wrong)} must be text"
+                )
+                continue
+            if segment["segment_id"] in labels:
+                errors.append(
+                    f"sentence {i} segment {j}: duplicate segment_id "
+                    f"{segment['segment_id']}"
+                )
+            labels.add(segment["segment_id"])
+    return errors
+
+
+def _parse_usrs(usr_lines, segment_labels, errors):
+    """Parse the USR file, keeping ``(label, parsed)`` for valid blocks."""
+    usrs = []
+    seen = set()
+    for block in iter_usr_blocks(usr_lines):
+        where = f"usr block {block.number} (line {block.line})"
+        parsed, error = parse_usr_block(block)
+        if error:
+            errors.append(f"{where}: {error}")
+        elif block.label not in segment_labels:
+            errors.append(f"{where}: unknown segment_id {block.label}")
+        elif block.label in seen:
+            errors.append(f"{where}: second USR for segment {block.label}")
+        else:
+            seen.add(block.label)
+            usrs.append((block.label, parsed))
+    return usrs
+
+
+def _sync_sentences(chapter, sentences, language, counts):
+    """Return the sentence primary keys of the bundle, inserting new ones."""
+    existing = {}
+    for row in db.session.query(
+        Sentence.id, Sentence.sentence_id, Sentence.text
+    ).filter(Sentence.chapter_id == chapter.id, Sentence.sentence_id.isnot(None)):
+        existing.setdefault(row.sentence_id, row)
+
+    ids = [None] * len(sentences)
+    new, changed = [], []
+    for i, sentence in enumerate(sentences):
+        row = existing.get(sentence.get("sentence_id"))
+        if row is None:
+            new.append(i)
+            continue
+        ids[i] = row.id
+        if row.text != sentence["text"]:
+            changed.append({"id": row.id, "text": sentence["text"]})
+
+    new_ids = insert_returning_ids(
+        Sentence,
+        [
+            {
+                "chapter_id": chapter.id,
+                "text": sentences[i]["text"],
+                "sentence_id": sentences[i].get("sentence_id"),
+                "language": language,
+            }
+            for i in new
+        ],
+    )
+    for i, sentence_id in zip(new, new_ids):
+        ids[i] = sentence_id
+    if changed:
+        db.session.execute(update(Sentence), changed)
+
+    counts.update(
+        created=len(new),
+        updated=len(changed),
+        unchanged=len(sentences) - len(new) - len(changed),
+    )
+    return ids
+
+
+def _sync_segments(chapter, sentence_ids, sentences, language, counts):
+    """Return the bundle's segments by label, writing only new or changed ones."""
+    existing = {}
+    for row in (
+        db.session.query(Segment)
+        .join(Sentence, Segment.sentence_id == Sentence.id)
+        .filter(Sentence.chapter_id == chapter.id, Segment.segment_id.isnot(None))
+        .with_entities(
+            Segment.id,
+            Segment.sentence_id,
+            Segment.source_hash,
+            *[getattr(Segment, field) for field in SEGMENT_FIELDS],
+        )
+    ):
+        existing.setdefault(row.segment_id, row)
+
+    segments, new, changed = {}, [], []
+    for sentence_id, sentence in zip(sentence_ids, sentences):
+        for segment in sentence["segments"]:
+            row = {
+                "sentence_id": sentence_id,
+                "source_hash": segment_source_hash(segment),
+                **{field: segment[field] for field in SEGMENT_FIELDS},
+            }
+            old = existing.get(segment["segment_id"])
+            if old is None:
+                new.append(row)
+                continue
+            # Segments written before source hashes are hashed as stored
+            old_hash = old.source_hash or segment_source_hash(old._mapping)
+            if old_hash != row["source_hash"] or old.sentence_id != sentence_id:
+                changed.append({"id": old.id, **row})
+            segments[segment["segment_id"]] = SimpleNamespace(id=old.id, **row)
+
+    new_ids = insert_returning_ids(
+        Segment, [{"language": language, **row} for row in new]
+    )
+    for segment_id, row in zip(new_ids, new):
+        segments[row["segment_id"]] = SimpleNamespace(id=segment_id, **row)
+    if changed:
+        db.session.execute(update(Segment), changed)
+
+    counts.update(
+        created=len(new),
+        updated=len(changed),
+        unchanged=len(segments) - len(new) - len(changed),
+    )
+    return segments
+
+
+def import_chapter(project, name, sentences, usr_lines=None, before_commit=None):
+    """Create or re-sync a chapter of ``project`` from a bundle and commit it.
+
+    ``sentences`` is the bundle's nested sentence list and ``usr_lines`` an
+    optional iterable of USR file lines. Raises ChapterImportError without
+    writing anything if the bundle is invalid; database errors roll the
+    whole import back and are re-raised. Returns the Chapter and, for
+    sentences, segments and USRs, how many were created, updated or left
+    unchanged. ``before_commit`` is called just before the commit; whatever
+    it raises rolls the import back, e.g. when a job is cancelled.
+    """
+    errors = [] if name else ["chapter name is required"]
+    chapter = Chapter.query.filter_by(project_id=project.id, title=name).first()
+    errors += _validate(sentences, resync=chapter is not None)
+    if errors:
+        raise ChapterImportError(errors)
+
+    labels = {
+        segment["segment_id"]
+        for sentence in sentences
+        for segment in sentence["segments"]
+    }
+    usrs = _parse_usrs(usr_lines, labels, errors) if usr_lines is not None else []
+    if errors:
+        raise ChapterImportError(errors)
+
+    counts = {
+        kind: Counter(created=0, updated=0, unchanged=0)
+        for kind in ("sentences", "segments", "usrs")
+    }
+    try:
+        if chapter is None:
+            chapter = Chapter(
+                project_id=project.id, title=name, language=project.language
+            )
+            db.session.add(chapter)
+            db.session.flush()
+
+        sentence_ids = _sync_sentences(
+            chapter, sentences, project.language, counts["sentences"]
+        )
+        segments = _sync_segments(
+            chapter, sentence_ids, sentences, project.language, counts["segments"]
+        )
+        synced = sync_usrs([(segments[label], parsed) for label, parsed in usrs])
+        counts["usrs"].update(status for status, _ in synced)
+
+        recompute_progress(project.id, [chapter.id])
+        if before_commit:
+            before_commit()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return chapter, {kind: dict(counter) for kind, counter in counts.items()}
@@ -0,0 +1,165 @@
+"""Batched loading of the concept dictionary from CSV.
+
+The CSV has a ``concept_label`` column plus any of the label columns below.
+Rows are streamed in chunks and upserted on ``concept_label``: new concepts
+are inserted and existing ones get their label columns overwritten with the
+CSV's values. Each chunk is one statement and one commit, so a large
+dictionary neither runs a lookup per row nor builds one huge transaction.
+
+On PostgreSQL the file can instead be COPY'd into a temporary table and
+merged with a single INSERT ... ON CONFLICT, which is faster still but
+commits everything at once.
+"""
+
+import csv
+import time
+from itertools import islice
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models import db, Concept
+
+CONCEPT_LABEL_COLUMNS = ["hindi_label", "sanskrit_label", "english_label", "mrsc"]
+CONCEPT_LOAD_CHUNK_SIZE = 5000
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _label_columns(fieldnames):
+    if not fieldnames or "concept_label" not in fieldnames:
+        raise ValueError("CSV must have a concept_label column")
+    return [column for column in CONCEPT_LABEL_COLUMNS if column in fieldnames]
+
+
+def _upsert_chunk(rows, columns):
+    """Insert or update one chunk of concepts, keyed on concept_label."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _UPSERT_INSERTS:
+        stmt = _UPSERT_INSERTS[dialect](Concept)
+        if columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Concept.concept_label],
+                set_={column: stmt.excluded[column] for column in columns},
+            )
+        else:
+            # A CSV of labels only adds new concepts and changes no others
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Concept.concept_label])
+        db.session.execute(stmt, rows)
+        return
+
+    # No native upsert: look up the chunk's existing labels in one query
+    existing = dict(
+        db.session.execute(
+            select(Concept.concept_label, Concept.id).where(
+                Concept.concept_label.in_([row["concept_label"] for row in rows])
+            )
+        ).all()
+    )
+    new_rows = [row for row in rows if row["concept_label"] not in existing]
+    if new_rows:
+        db.session.execute(insert(Concept), new_rows)
+    changed = [
+        {"id": existing[row["concept_label"]], **{c: row[c] for c in columns}}
+        for row in rows
+        if row["concept_label"] in existing
+    ]
+    if changed and columns:
+        db.session.execute(update(Concept), changed)
+
+
+def load_concepts(csvfile, chunk_size=CONCEPT_LOAD_CHUNK_SIZE, progress=None):
+    """Upsert the concepts of an open CSV file chunk by chunk.
+
+    ``progress`` is called after every committed chunk with the number of
+    rows loaded so far and the elapsed seconds. Returns the totals.
+    """
+    reader = csv.DictReader(csvfile)
+    columns = _label_columns(reader.fieldnames)
+    start = time.perf_counter()
+    loaded = 0
+
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            break
+
+        # A label may only be written once per statement; the last row wins
+        rows = {}
+        for row in chunk:
+            label = (row.get("concept_label") or "").strip()
+            if label:
+                rows[label] = {
+                    "concept_label": label,
+                    # New concepts get "" for label columns the CSV lacks
+                    **{c: row.get(c) or "" for c in CONCEPT_LABEL_COLUMNS},
+                }
+        if rows:
+            _upsert_chunk(list(rows.values()), columns)
+        db.session.commit()
+
+        loaded += len(chunk)
+        if progress:
+            progress(loaded, time.perf_counter() - start)
+
+    return _stats(loaded, time.perf_counter() - start)
+
+
+def copy_concepts(csvfile, progress=None):
+    """Load an open CSV file with COPY and one merge statement (PostgreSQL).
+
+    The file is streamed by the server into a temporary table, so rows never
+    pass through Python. Everything is committed in one transaction.
+    ``progress`` is called once, with the rows loaded and the elapsed seconds,
+    after the merge and before the commit, so raising in it rolls the whole
+    load back.
+    """
+    if db.session.get_bind().dialect.name != "postgresql":
+        raise ValueError("COPY loading needs PostgreSQL")
+
+    start = time.perf_counter()
+    header = next(csv.reader([csvfile.readline()]), [])
+    columns = _label_columns(header)
+    # Only known column names reach the SQL below; others are loaded and dropped
+    staging_columns = ", ".join(f'"c{i}" text' for i in range(len(header)))
+    source = {name: f'"c{i}"' for i, name in enumerate(header)}
+
+    label = f"btrim({source['concept_label']})"
+    values = ", ".join(
+        f"coalesce({source[c]}, '')" if c in source else "''"
+        for c in CONCEPT_LABEL_COLUMNS
+    )
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+    conflict = f"DO UPDATE SET {updates}" if columns else "DO NOTHING"
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            f"CREATE TEMP TABLE concept_staging ({staging_columns}) ON COMMIT DROP"
+        )
+        cursor.copy_expert("COPY concept_staging FROM STDIN WITH (FORMAT csv)", csvfile)
+        loaded = cursor.rowcount
+        # DISTINCT ON keeps one row per label, like the chunked loader's last wins
+        cursor.execute(
+            f"INSERT INTO concept (concept_label, "
+            f"{', '.join(CONCEPT_LABEL_COLUMNS)}) "
+            f"SELECT DISTINCT ON ({label}) {label}, {values} "
+            f"FROM (SELECT *, row_number() OVER () AS n FROM concept_staging) s "
+            f"WHERE {label} <> '' ORDER BY {label}, n DESC "
+            f"ON CONFLICT (concept_label) {conflict}"
+        )
+    finally:
+        cursor.close()
+    if progress:
+        progress(loaded, time.perf_counter() - start)
+    db.session.commit()
+
+    return _stats(loaded, time.perf_counter() - start)
+
+
+def _stats(rows, seconds):
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds else rows,
+    }
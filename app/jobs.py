@@ -0,0 +1,245 @@
+"""Background jobs for long-running admin operations.
+
+Imports, concept loads and exports that would hold a request open for
+minutes are run as jobs instead: the request stores a ``Job`` row and
+returns its id, and one of JOB_WORKERS threads in the same process runs the
+job inside an app context. Uploaded files are spooled to JOB_SPOOL_DIR first,
+since the request is gone by the time the job runs. No broker is involved;
+the ``job`` table is the only shared state, so any server worker can report
+on or cancel a job.
+
+A job function is called as ``fn(job, *args, **kwargs)`` with a JobContext
+and reports its progress through it. Cancelling a running job takes effect
+at its next progress report, so work it already committed is kept. Jobs
+still queued or running when their process exits are not resumed.
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.models import db, Job
+
+JOB_STATUSES = ["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been asked to stop."""
+
+
+class JobContext:
+    """Handed to a running job to report progress and check for cancellation.
+
+    Progress is written on a connection of its own, so it neither commits
+    nor waits for the job's work in ``db.session``.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def progress(self, done, total=None, counts=None, check=True):
+        """Record ``done`` rows processed; raises JobCancelled if cancelled.
+
+        Pass ``check=False`` once the job's work is committed, when it is
+        too late to stop.
+        """
+        values = {"progress": done}
+        if total is not None:
+            values["total"] = total
+        if counts is not None:
+            values["result"] = dict(counts)
+
+        with db.engine.begin() as conn:
+            conn.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            cancel = conn.scalar(
+                db.select(Job.cancel_requested).where(Job.id == self.job_id)
+            )
+        if cancel and check:
+            raise JobCancelled()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job has been asked to stop.
+
+        Only reads, so it can be called while the job holds uncommitted
+        writes, even on SQLite.
+        """
+        with db.engine.connect() as conn:
+            cancel = conn.scalar(
+                db.select(Job.cancel_requested).where(Job.id == self.job_id)
+            )
+        if cancel:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """Thread pool running jobs stored in the ``job`` table."""
+
+    def __init__(self, workers=2, spool_dir=None):
+        self.workers = workers
+        self.spool_dir = spool_dir
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.workers = app.config.get("JOB_WORKERS", self.workers)
+        self.spool_dir = app.config.get("JOB_SPOOL_DIR") or self.spool_dir
+        app.extensions["job_runner"] = self
+
+    def _ensure_started(self):
+        # Started lazily so forked server workers each get their own threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="admin-job"
+                )
+
+    def spool_path(self, suffix=""):
+        """Path of a new, empty file in the spool directory."""
+        directory = self.spool_dir or os.path.join(tempfile.gettempdir(), "usr-jobs")
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+        os.close(fd)
+        return path
+
+    def spool(self, stream, suffix=""):
+        """Copy an uploaded file or request body stream to the spool directory."""
+        path = self.spool_path(suffix)
+        with open(path, "wb") as out:
+            while True:
+                data = stream.read(64 * 1024)
+                if not data:
+                    break
+                out.write(data)
+        return path
+
+    def submit(
+        self,
+        kind,
+        fn,
+        args=(),
+        kwargs=None,
+        params=None,
+        files=(),
+        output_path=None,
+        created_by=None,
+    ):
+        """Store a queued job and hand it to the pool; returns the Job.
+
+        ``files`` are spooled paths the job owns; they are removed once it
+        has finished, whatever the outcome. ``output_path`` is the file the
+        job writes its output to, kept only if the job succeeds.
+        """
+        job = Job(
+            kind=kind,
+            status="queued",
+            params=params,
+            output_path=output_path,
+            created_by=created_by,
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self._ensure_started()
+        self._executor.submit(
+            self._run,
+            current_app._get_current_object(),
+            job.id,
+            fn,
+            args,
+            kwargs or {},
+            list(files),
+            output_path,
+        )
+        return job
+
+    def _run(self, app, job_id, fn, args, kwargs, files, output_path):
+        succeeded = False
+        with app.app_context():
+            try:
+                started = db.session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == "queued")
+                    .values(status="running", started_at=datetime.utcnow())
+                )
+                db.session.commit()
+                if started.rowcount != 1:
+                    return  # cancelled while queued
+
+                values = {"status": "succeeded"}
+                try:
+                    result = fn(JobContext(job_id), *args, **kwargs)
+                    if result is not None:
+                        values["result"] = result
+                except JobCancelled:
+                    db.session.rollback()
+                    values = {"status": "cancelled", "output_path": None}
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.exception(f"Job {job_id} failed")
+                    values = {"status": "failed", "error": str(e), "output_path": None}
+
+                db.session.execute(
+                    update(Job)
+                    .where(Job.id == job_id)
+                    .values(finished_at=datetime.utcnow(), **values)
+                )
+                db.session.commit()
+                succeeded = values["status"] == "succeeded"
+            finally:
+                if not succeeded:
+                    files.append(output_path)  # partial or never written
+                for path in files:
+                    if path and os.path.exists(path):
+                        os.remove(path)
+
+
+def cancel_job(job):
+    """Cancel a queued job or ask a running one to stop.
+
+    Returns False if the job had already finished.
+    """
+    cancelled = db.session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "queued")
+        .values(status="cancelled", finished_at=datetime.utcnow())
+    )
+    if cancelled.rowcount == 0:
+        cancelled = db.session.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == "running")
+            .values(cancel_requested=True)
+        )
+    db.session.commit()
+    db.session.refresh(job)
+    return cancelled.rowcount == 1
+
+
+def serialize_job(job):
+    end = job.finished_at or (datetime.utcnow() if job.started_at else None)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params,
+        "progress": job.progress,
+        "total": job.total,
+        "result": job.result,
+        "error": job.error,
+        "has_output": job.output_path is not None,
+        "cancel_requested": job.cancel_requested,
+        "created_by": job.created_by,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "duration_seconds": (
+            round((end - job.started_at).total_seconds(), 3) if job.started_at else None
+        ),
+    }
+
+
+job_runner = JobRunner()
@@ -52,6 +52,7 @@ class Project(db.Model):
     chapters = db.relationship(
         "Chapter", back_populates="project", lazy=True, cascade="all, delete-orphan"
     )
+    progress = db.relationship("Progress", lazy=True, cascade="all, delete-orphan")
 
 
 class Chapter(db.Model):
@@ -68,6 +69,7 @@ class Chapter(db.Model):
     sentences = db.relationship(
         "Sentence", back_populates="chapter", lazy=True, cascade="all, delete-orphan"
     )
+    progress = db.relationship("Progress", lazy=True, cascade="all, delete-orphan")
 
 
 class Sentence(db.Model):
@@ -99,6 +101,7 @@ class Segment(db.Model):
     language = db.Column(
         db.String(50), nullable=False, default="hindi"
     )  # Add this line
+    source_hash = db.Column(db.String(64))  # sha256 of the imported fields
 
     sentence = db.relationship("Sentence", back_populates="segments")
     usrs = db.relationship(
@@ -117,6 +120,11 @@ class USR(db.Model):
     status = db.Column(db.String(50), default="Pending")
     sentence_type = db.Column(db.String(100))  # e.g., %affirmative
     language = db.Column(db.String(50), nullable=False, default="hindi")
+    rendered_text = db.Column(db.Text)  # materialized 9-column concept rows
+    content_hash = db.Column(db.String(64))  # sha256 of the full rendered USR
+    source_hash = db.Column(db.String(64))  # sha256 of the block it was imported from
+    # Bumped on every write to the USR, served as its ETag
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     # Relationships
     segment = db.relationship("Segment", back_populates="usrs")
     lexical_info = db.relationship(
@@ -247,6 +255,65 @@ class Assignment(db.Model):
     )
 
 
+class Progress(db.Model):
+    """Denormalized annotation progress counters, maintained by app.progress.
+
+    There is one row per chapter and one per project (with chapter_id NULL)
+    holding the totals of its chapters.
+    """
+
+    __tablename__ = "progress"
+    __table_args__ = (
+        db.UniqueConstraint("project_id", "chapter_id"),
+        # NULLs are distinct in the constraint above, so project rows need this
+        db.Index(
+            "uq_progress_project_total",
+            "project_id",
+            unique=True,
+            postgresql_where=db.text("chapter_id IS NULL"),
+            sqlite_where=db.text("chapter_id IS NULL"),
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey("chapter.id"))
+    segments = db.Column(db.Integer, nullable=False, default=0)
+    usrs = db.Column(db.Integer, nullable=False, default=0)
+    assigned = db.Column(db.Integer, nullable=False, default=0)  # all assignments
+    in_progress = db.Column(db.Integer, nullable=False, default=0)
+    submitted = db.Column(db.Integer, nullable=False, default=0)
+    reviewed = db.Column(db.Integer, nullable=False, default=0)
+    needs_revision = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+    )
+
+
+class Job(db.Model):
+    """A long-running admin operation run in the background by app.jobs."""
+
+    __tablename__ = "job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # e.g., usr_import
+    # queued, running, succeeded, failed or cancelled
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id"))
+    params = db.Column(db.JSON)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # rows processed
+    total = db.Column(db.Integer)  # rows to process, when known upfront
+    result = db.Column(db.JSON)  # row counts, updated while running
+    error = db.Column(db.Text)
+    output_path = db.Column(db.String(500))  # file produced by the job, if any
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
 class Concept(db.Model):
     __tablename__ = "concept"
 
@@ -410,7 +477,9 @@ class InterfaceFeature(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     interface_id = db.Column(db.Integer, db.ForeignKey("interface.id"), nullable=False)
     name = db.Column(db.String(150), nullable=False)
-    category = db.Column(db.String(100))  # evaluation, editing, feedback, alignment, tagging
+    category = db.Column(
+        db.String(100)
+    )  # evaluation, editing, feedback, alignment, tagging
     description = db.Column(db.Text)
     enabled = db.Column(db.Boolean, default=True)
 
@@ -424,7 +493,9 @@ class InterfaceWorkflow(db.Model):
     interface_id = db.Column(db.Integer, db.ForeignKey("interface.id"), nullable=False)
     name = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
-    steps = db.Column(db.JSON, default=list)  # ["Open task","Review MT","Tag errors",...]
+    steps = db.Column(
+        db.JSON, default=list
+    )  # ["Open task","Review MT","Tag errors",...]
 
     interface = db.relationship("Interface", back_populates="workflows")
 
@@ -0,0 +1,244 @@
+"""Denormalized per-project and per-chapter progress counters.
+
+Writes that change what a chapter contains or an assignment's status call
+``adjust_*`` with the change, which bumps the chapter row and its project row
+with a single atomic ``UPDATE ... SET col = col + n``. Reading a project's
+progress is then one indexed lookup instead of a scan of the assignment table.
+
+Rows are created lazily: if a chapter or project has no row yet, that
+chapter's counters are recomputed from the source tables instead. Deletes, which can cascade to
+any number of rows, also recompute. ``scripts/recompute_progress.py`` rebuilds
+everything for repairs.
+"""
+
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models import db, Project, Chapter, Sentence, Segment, USR, Assignment
+from app.models import Progress
+
+PROGRESS_COUNTERS = [
+    "segments",
+    "usrs",
+    "assigned",
+    "in_progress",
+    "submitted",
+    "reviewed",
+    "needs_revision",
+]
+
+# annotation_status -> counter; other statuses only count towards "assigned"
+STATUS_COUNTERS = {
+    "In Progress": "in_progress",
+    "Submitted": "submitted",
+    "Submitted for Review": "submitted",
+    "Reviewed": "reviewed",
+    "Needs Revision": "needs_revision",
+}
+
+
+def status_deltas(old_status, new_status):
+    """Counter changes for an assignment moving from one status to another."""
+    old = STATUS_COUNTERS.get(old_status)
+    new = STATUS_COUNTERS.get(new_status)
+    if old == new:
+        return {}
+
+    deltas = {}
+    if old:
+        deltas[old] = -1
+    if new:
+        deltas[new] = 1
+    return deltas
+
+
+def chapter_of_segment(segment_id):
+    """Return the ``(chapter_id, project_id)`` a segment belongs to."""
+    return (
+        db.session.query(Chapter.id, Chapter.project_id)
+        .join(Sentence, Sentence.chapter_id == Chapter.id)
+        .join(Segment, Segment.sentence_id == Sentence.id)
+        .filter(Segment.id == segment_id)
+        .first()
+    )
+
+
+def adjust_progress(chapter_id, project_id, **deltas):
+    """Add ``deltas`` to the counters of a chapter and of its project.
+
+    Call this after making the change in the session; it is flushed first so
+    that a recompute, if one is needed, sees it.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    db.session.flush()
+    result = db.session.execute(
+        update(Progress)
+        .where(
+            Progress.project_id == project_id,
+            or_(Progress.chapter_id == chapter_id, Progress.chapter_id.is_(None)),
+        )
+        .values(
+            updated_at=func.current_timestamp(),
+            **{name: getattr(Progress, name) + delta for name, delta in deltas.items()},
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # A missing chapter or project row means the counters were never started;
+    # recount just this chapter (and any others without a row yet)
+    if result.rowcount < 2:
+        recompute_progress(project_id, [chapter_id])
+
+
+def adjust_segment_progress(segment_id, **deltas):
+    """``adjust_progress`` for the chapter containing a segment."""
+    if segment_id is None or not any(deltas.values()):
+        return
+
+    chapter = chapter_of_segment(segment_id)
+    if chapter:
+        adjust_progress(chapter.id, chapter.project_id, **deltas)
+
+
+def adjust_status_progress(segment_id, old_status, new_status):
+    """Record an assignment's status change."""
+    adjust_segment_progress(segment_id, **status_deltas(old_status, new_status))
+
+
+_INSERT_IGNORES = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _counts_by_chapter(query):
+    return {row[0]: row[1] for row in query.all()}
+
+
+def _create_rows(project_id, chapter_ids):
+    """Insert zeroed progress rows, skipping any a concurrent recompute added."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _INSERT_IGNORES:
+        stmt = _INSERT_IGNORES[dialect](Progress).on_conflict_do_nothing()
+    else:
+        stmt = insert(Progress)
+    db.session.execute(
+        stmt,
+        [{"project_id": project_id, "chapter_id": c} for c in chapter_ids],
+    )
+
+
+def _progress_rows(project_id):
+    return {
+        row.chapter_id: row
+        for row in Progress.query.filter_by(project_id=project_id)
+        .populate_existing()
+        .all()
+    }
+
+
+def recompute_progress(project_id, chapter_ids=None):
+    """Rebuild progress counters of a project from the source tables.
+
+    With ``chapter_ids`` only those chapters are recounted (pass ``[]`` after
+    deleting a chapter), plus any chapter that has no row yet; the project
+    row is always re-summed from its chapter rows. Each counter takes one
+    GROUP BY query for the project.
+    """
+    db.session.flush()
+
+    chapters = {
+        row.id
+        for row in db.session.query(Chapter.id).filter(Chapter.project_id == project_id)
+    }
+    rows = _progress_rows(project_id)
+
+    # Drop rows of chapters that are gone, and recount chapters without a row
+    for chapter_id in [c for c in rows if c is not None and c not in chapters]:
+        db.session.delete(rows.pop(chapter_id))
+    recount = {c for c in chapters if c not in rows}
+    missing = sorted(recount) + ([None] if None not in rows else [])
+    if missing:
+        _create_rows(project_id, missing)
+        rows = _progress_rows(project_id)
+    recount.update(chapters if chapter_ids is None else chapters & set(chapter_ids))
+    recount = sorted(recount)
+
+    if recount:
+        segments = (
+            db.session.query(Sentence.chapter_id, func.count(Segment.id))
+            .join(Segment, Segment.sentence_id == Sentence.id)
+            .filter(Sentence.chapter_id.in_(recount))
+            .group_by(Sentence.chapter_id)
+        )
+        usrs = (
+            db.session.query(Sentence.chapter_id, func.count(USR.id))
+            .join(Segment, Segment.sentence_id == Sentence.id)
+            .join(USR, USR.segment_id == Segment.id)
+            .filter(Sentence.chapter_id.in_(recount))
+            .group_by(Sentence.chapter_id)
+        )
+        assignments = (
+            db.session.query(
+                Sentence.chapter_id,
+                Assignment.annotation_status,
+                func.count(Assignment.id),
+            )
+            .join(Segment, Segment.sentence_id == Sentence.id)
+            .join(Assignment, Assignment.segment_id == Segment.id)
+            .filter(Sentence.chapter_id.in_(recount))
+            .group_by(Sentence.chapter_id, Assignment.annotation_status)
+        )
+
+        counts = {
+            chapter_id: dict.fromkeys(PROGRESS_COUNTERS, 0) for chapter_id in recount
+        }
+        for chapter_id, count in _counts_by_chapter(segments).items():
+            counts[chapter_id]["segments"] = count
+        for chapter_id, count in _counts_by_chapter(usrs).items():
+            counts[chapter_id]["usrs"] = count
+        for chapter_id, status, count in assignments.all():
+            counts[chapter_id]["assigned"] += count
+            if status in STATUS_COUNTERS:
+                counts[chapter_id][STATUS_COUNTERS[status]] += count
+
+        for chapter_id, values in counts.items():
+            for name, value in values.items():
+                setattr(rows[chapter_id], name, value)
+
+    project_row = rows[None]
+    chapter_rows = [row for chapter_id, row in rows.items() if chapter_id is not None]
+    for name in PROGRESS_COUNTERS:
+        setattr(project_row, name, sum(getattr(row, name) for row in chapter_rows))
+
+    db.session.flush()
+    return project_row
+
+
+def recompute_projects_progress(project_ids):
+    for project_id in project_ids:
+        recompute_progress(project_id)
+
+
+def recompute_all_progress():
+    """Rebuild the counters of every project; returns the number of projects."""
+    project_ids = [row.id for row in db.session.query(Project.id).all()]
+    recompute_projects_progress(project_ids)
+    return len(project_ids)
+
+
+def project_progress_rows(project_id):
+    """``(Progress, chapter title)`` rows of a project, project row first."""
+    return (
+        db.session.query(Progress, Chapter.title)
+        .outerjoin(Chapter, Progress.chapter_id == Chapter.id)
+        .filter(Progress.project_id == project_id)
+        .order_by(Progress.chapter_id.isnot(None), Progress.chapter_id)
+        .all()
+    )
+
+
+def serialize_progress(row):
+    data = {name: getattr(row, name) for name in PROGRESS_COUNTERS}
+    data["updated_at"] = row.updated_at.isoformat() if row.updated_at else None
+    return data
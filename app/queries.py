@@ -0,0 +1,113 @@
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from app.models import db, Project, Chapter, Sentence, Segment, USR, Assignment
+
+
+def usr_layer_loaders():
+    """Loader options that fetch every USR layer with one SELECT per layer."""
+    return [
+        selectinload(USR.lexical_info),
+        selectinload(USR.dependency_info),
+        selectinload(USR.discourse_coref_info),
+        selectinload(USR.construction_info),
+        selectinload(USR.sentence_type_info),
+    ]
+
+
+def segment_usr_loaders(include_layers=True):
+    """Loader options for Segment -> USRs (-> layers)."""
+    usrs = selectinload(Segment.usrs)
+    if include_layers:
+        usrs = usrs.options(*usr_layer_loaders())
+    return [usrs]
+
+
+def project_hierarchy_loaders(include_layers=True):
+    """Loader options for the whole Project -> ... -> USR layer tree.
+
+    The tree is loaded with one SELECT per level (chapters, sentences,
+    segments, USRs and each of the five layers), independent of project size.
+    Without layers the USRs' materialized text is all that gets read.
+    """
+    return [
+        selectinload(Project.chapters)
+        .selectinload(Chapter.sentences)
+        .selectinload(Sentence.segments)
+        .options(*segment_usr_loaders(include_layers))
+    ]
+
+
+def assignment_hierarchy_query(*columns):
+    """Select ``columns`` over Assignment joined up to its USR and Project.
+
+    Inner joins drop assignments whose USR, segment, sentence, chapter or
+    project no longer exists.
+    """
+    return (
+        db.session.query(*columns)
+        .select_from(Assignment)
+        .join(USR, Assignment.usr_id == USR.id)
+        .join(Segment, Assignment.segment_id == Segment.id)
+        .join(Sentence, Segment.sentence_id == Sentence.id)
+        .join(Chapter, Sentence.chapter_id == Chapter.id)
+        .join(Project, Chapter.project_id == Project.id)
+    )
+
+
+def assignment_status_summary(*criteria):
+    """Count assignments matching ``criteria`` by project, chapter and status.
+
+    The counts come from a single GROUP BY query; only one row per chapter and
+    status is transferred, which is then rolled up to projects and a total.
+    """
+    rows = (
+        assignment_hierarchy_query(
+            Project.id.label("project_id"),
+            Project.title.label("project_title"),
+            Chapter.id.label("chapter_id"),
+            Chapter.title.label("chapter_title"),
+            Assignment.annotation_status,
+            func.count(Assignment.id).label("count"),
+        )
+        .filter(*criteria)
+        .group_by(
+            Project.id,
+            Project.title,
+            Chapter.id,
+            Chapter.title,
+            Assignment.annotation_status,
+        )
+        .order_by(Project.id, Chapter.id)
+        .all()
+    )
+
+    summary = {"total": 0, "by_status": {}, "projects": []}
+    project_data = chapter_data = None
+    for row in rows:
+        if project_data is None or project_data["id"] != row.project_id:
+            project_data = {
+                "id": row.project_id,
+                "title": row.project_title,
+                "total": 0,
+                "by_status": {},
+                "chapters": [],
+            }
+            summary["projects"].append(project_data)
+            chapter_data = None
+
+        if chapter_data is None or chapter_data["id"] != row.chapter_id:
+            chapter_data = {
+                "id": row.chapter_id,
+                "title": row.chapter_title,
+                "total": 0,
+                "by_status": {},
+            }
+            project_data["chapters"].append(chapter_data)
+
+        # Legacy rows may have no status; count them under the model default
+        status = row.annotation_status or "Unassigned"
+        for counts in (summary, project_data, chapter_data):
+            counts["total"] += row.count
+            counts["by_status"][status] = counts["by_status"].get(status, 0) + row.count
+
+    return summary
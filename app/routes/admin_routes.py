@@ -1,16 +1,66 @@
-from flask import Blueprint, current_app, request, jsonify
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    request,
+    jsonify,
+    send_file,
+    stream_with_context,
+    url_for,
+)
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_mail import Message
 from app.extensions import mail
 from itsdangerous import URLSafeTimedSerializer
 from app.models import db, User, Project, Chapter, Sentence, Segment, USR, Assignment
-from app.models import (
-    LexicalInfo,
-    DependencyInfo,
-    DiscourseCorefInfo,
-    ConstructionInfo,
-    SentenceTypeInfo,
+from app.models import Progress, Job
+from app.queries import (
+    usr_layer_loaders,
+    segment_usr_loaders,
+    project_hierarchy_loaders,
+    assignment_hierarchy_query,
+)
+from app.bulk_import import (
+    import_usr_blocks,
+    insert_returning_ids,
+    iter_usr_import,
+    prepare_usr,
+    segment_source_hash,
+    sync_usrs,
+)
+from app.chapter_import import ChapterImportError, import_chapter, sentences_from_tsv
+from app.concept_loader import CONCEPT_LOAD_CHUNK_SIZE, copy_concepts, load_concepts
+from app.jobs import JOB_STATUSES, cancel_job, job_runner, serialize_job
+from app.progress import (
+    adjust_segment_progress,
+    adjust_status_progress,
+    chapter_of_segment,
+    project_progress_rows,
+    recompute_progress,
+    recompute_projects_progress,
+    serialize_progress,
+    status_deltas,
 )
+from app.usr_format import (
+    iter_usr_blocks,
+    parse_custom_usr_format,
+    serialize_usr_layers,
+    usr_text,
+)
+from app.visualization import (
+    CONTENT_TYPES,
+    render_pool,
+    stream_visualization_zip,
+    visualization_cache,
+    visualization_response,
+)
+from sqlalchemy import select
+from collections import Counter
+from contextlib import ExitStack
+import codecs
+import io
+import json
+import os
 import random
 import string
 from datetime import datetime, timedelta
@@ -27,6 +77,24 @@ def admin_only():
     return user
 
 
+def async_requested():
+    """True if the request asks to run as a background job (``?async=true``)."""
+    return request.args.get("async", "false").lower() == "true"
+
+
+def job_accepted(job):
+    return (
+        jsonify(
+            {
+                "msg": "Job queued",
+                "job_id": job.id,
+                "status_url": url_for("admin.get_job", job_id=job.id),
+            }
+        ),
+        202,
+    )
+
+
 # Generate token
 def generate_token(email):
     serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
@@ -215,12 +283,22 @@ def delete_user(user_id):
         return jsonify({"msg": "User not found"}), 404
 
     try:
+        user_assignments = (Assignment.annotator_id == user_id) | (
+            Assignment.reviewer_id == user_id
+        )
+        project_ids = [
+            row.project_id
+            for row in assignment_hierarchy_query(Project.id.label("project_id"))
+            .filter(user_assignments)
+            .distinct()
+        ]
+
         # First delete assignments for this user
-        Assignment.query.filter(
-            (Assignment.annotator_id == user_id) | (Assignment.reviewer_id == user_id)
-        ).delete()
+        Assignment.query.filter(user_assignments).delete()
+        Job.query.filter_by(created_by=user_id).update({"created_by": None})
 
         db.session.delete(user)
+        recompute_projects_progress(project_ids)
         db.session.commit()
         return jsonify({"msg": "User deleted"})
     except Exception as e:
@@ -362,12 +440,17 @@ def get_projects():
         if not projects:
             return jsonify([])  # Return empty array if no projects
 
+        progress = {
+            row.project_id: serialize_progress(row)
+            for row in Progress.query.filter(Progress.chapter_id.is_(None))
+        }
         project_list = [
             {
                 "id": p.id,
                 "title": p.title,
                 "description": p.description,
                 "chapter_count": len(p.chapters),
+                "progress": progress.get(p.id),
             }
             for p in projects
         ]
@@ -422,6 +505,47 @@ def get_project(project_id):
     )
 
 
+@admin_bp.route("/project/<int:project_id>/progress", methods=["GET"])
+@jwt_required()
+def get_project_progress(project_id):
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    project = Project.query.get(project_id)
+    if not project:
+        return jsonify({"msg": "Project not found"}), 404
+
+    rows = project_progress_rows(project_id)
+    if not any(progress.chapter_id is None for progress, _ in rows):
+        # Counters were never started for this project
+        recompute_progress(project_id)
+        db.session.commit()
+        rows = project_progress_rows(project_id)
+
+    chapters = []
+    project_progress = None
+    for progress, chapter_title in rows:
+        if progress.chapter_id is None:
+            project_progress = serialize_progress(progress)
+        else:
+            chapters.append(
+                {
+                    "chapter_id": progress.chapter_id,
+                    "title": chapter_title,
+                    **serialize_progress(progress),
+                }
+            )
+
+    return jsonify(
+        {
+            "project_id": project.id,
+            "title": project.title,
+            "progress": project_progress,
+            "chapters": chapters,
+        }
+    )
+
+
 # CHAPTER ROUTES
 @admin_bp.route("/project/<int:project_id>/chapter", methods=["POST"])
 @jwt_required()
@@ -449,6 +573,124 @@ def create_chapter(project_id):
     )
 
 
+CHAPTER_IMPORT_FILES = ["sentences", "segments", "usrs"]
+
+
+def run_chapter_import(project, name, sentences, files, before_commit=None):
+    """Import a chapter from a JSON bundle or from uploaded text files.
+
+    ``sentences`` is the bundle's sentence list, or None to read it from the
+    ``sentences`` and ``segments`` TSVs in ``files``.
+    """
+    if sentences is None:
+        sentences = sentences_from_tsv(files["sentences"], files.get("segments"))
+    return import_chapter(project, name, sentences, files.get("usrs"), before_commit)
+
+
+def chapter_import_job(job, project_id, name, sentences, paths):
+    project = db.session.get(Project, project_id)
+    if not project:
+        raise ValueError("Project not found")
+
+    with ExitStack() as stack:
+        files = {
+            field: stack.enter_context(open(path, encoding="utf-8"))
+            for field, path in paths.items()
+        }
+        # One transaction: a cancel is honoured only until the commit
+        chapter, counts = run_chapter_import(
+            project, name, sentences, files, before_commit=job.check_cancelled
+        )
+
+    job.progress(sum(counts["segments"].values()), counts=counts, check=False)
+    return {"chapter_id": chapter.id, "title": chapter.title, **counts}
+
+
+@admin_bp.route("/project/<int:project_id>/chapter_import", methods=["POST"])
+@jwt_required()
+def import_chapter_bundle(project_id):
+    """Create a chapter with all its sentences, segments and USRs at once.
+
+    Accepts the JSON bundle described in app.chapter_import, or a multipart
+    form with a ``name`` field and ``sentences``, ``segments`` and ``usrs``
+    files. Either everything is written or, on any error, nothing is. If the
+    project already has a chapter of that name, only what changed in the
+    bundle is written to it. ``?async=true`` runs the import as a job.
+    """
+    admin = admin_only()
+    if not admin:
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    project = Project.query.get(project_id)
+    if not project:
+        return jsonify({"msg": "Project not found"}), 404
+
+    if request.files:
+        if "sentences" not in request.files:
+            return jsonify({"msg": "sentences file required"}), 400
+        name = request.form.get("name")
+        sentences = None
+        uploads = {
+            field: request.files[field].stream
+            for field in CHAPTER_IMPORT_FILES
+            if field in request.files
+        }
+    else:
+        data = request.get_json(silent=True) or {}
+        name = data.get("name")
+        sentences = data.get("sentences")
+        if not isinstance(sentences, list):
+            return jsonify({"msg": "sentences list required"}), 400
+        uploads = {}
+        if data.get("usr_text"):
+            uploads["usrs"] = io.BytesIO(data["usr_text"].encode("utf-8"))
+
+    if async_requested():
+        paths = {field: job_runner.spool(stream) for field, stream in uploads.items()}
+        job = job_runner.submit(
+            "chapter_import",
+            chapter_import_job,
+            args=(project.id, name, sentences, paths),
+            params={"project_id": project.id, "name": name},
+            files=paths.values(),
+            created_by=admin.id,
+        )
+        return job_accepted(job)
+
+    try:
+        chapter, counts = run_chapter_import(
+            project,
+            name,
+            sentences,
+            {field: text_upload(stream) for field, stream in uploads.items()},
+        )
+    except ChapterImportError as e:
+        return (
+            jsonify(
+                {
+                    "msg": "Invalid chapter bundle, nothing was created",
+                    "errors": e.errors,
+                }
+            ),
+            400,
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error importing chapter: {str(e)}")
+        return jsonify({"msg": "Error importing chapter", "error": str(e)}), 500
+
+    return jsonify(
+        {
+            "msg": "Chapter imported",
+            "chapter_id": chapter.id,
+            "title": chapter.title,
+            "sentence_count": sum(counts["sentences"].values()),
+            "segment_count": sum(counts["segments"].values()),
+            "usr_count": sum(counts["usrs"].values()),
+            **counts,
+        }
+    )
+
+
 @admin_bp.route("/project/<int:project_id>/chapters", methods=["GET"])
 @jwt_required()
 def get_project_chapters(project_id):
@@ -532,7 +774,9 @@ def delete_chapter(chapter_id):
 
     try:
         # Will cascade to sentences, segments, USRs and assignments
+        project_id = chapter.project_id
         db.session.delete(chapter)
+        recompute_progress(project_id, [])
         db.session.commit()
         return jsonify({"msg": "Chapter and all its contents deleted successfully"})
     except Exception as e:
@@ -552,22 +796,24 @@ def create_sentence(chapter_id):
     if not data or "sentences" not in data:
         return jsonify({"msg": "Sentences data required"}), 400
 
-    created = []
-    for sent_data in data["sentences"]:
-        sentence = Sentence(
-            chapter_id=chapter_id,
-            text=sent_data.get("text"),
-            sentence_id=sent_data.get("sentence_id"),  # e.g., Geo_nios_3ch_0002
-        )
-        db.session.add(sentence)
-        db.session.flush()
-        created.append(
-            {
-                "sentence_id": sentence.id,
-                "text": sentence.text,
-                "chapter_id": sentence.chapter_id,
-            }
-        )
+    rows = [
+        {
+            "chapter_id": chapter_id,
+            "text": sent_data.get("text"),
+            "sentence_id": sent_data.get("sentence_id"),  # e.g., Geo_nios_3ch_0002
+        }
+        for sent_data in data["sentences"]
+    ]
+    # One multi-row INSERT ... RETURNING instead of a flush per sentence
+    sentence_ids = insert_returning_ids(Sentence, rows)
+    created = [
+        {
+            "sentence_id": sentence_id,
+            "text": row["text"],
+            "chapter_id": chapter_id,
+        }
+        for sentence_id, row in zip(sentence_ids, rows)
+    ]
 
     db.session.commit()
     return jsonify({"msg": "Sentences added", "sentences": created})
@@ -610,7 +856,9 @@ def delete_sentence(sentence_id):
 
     try:
         # Will cascade to segments, USRs and assignments
+        chapter = sentence.chapter
         db.session.delete(sentence)
+        recompute_progress(chapter.project_id, [chapter.id])
         db.session.commit()
         return jsonify({"msg": "Sentence and all its contents deleted successfully"})
     except Exception as e:
@@ -654,11 +902,10 @@ def create_segment(sentence_id):
             return jsonify({"msg": "Segments data required"}), 400
         segments = data["segments"]
 
-    # Validate and create segments
-    created = []
+    # Validate segments
+    required_fields = ["segment_id", "text", "wxtext", "englishtext"]
     for seg_data in segments:
         # Check for required fields
-        required_fields = ["segment_id", "text", "wxtext", "englishtext"]
         if not all(field in seg_data for field in required_fields):
             return (
                 jsonify(
@@ -671,27 +918,32 @@ def create_segment(sentence_id):
                 400,
             )
 
-        segment = Segment(
-            sentence_id=sentence_id,
-            segment_id=seg_data["segment_id"],
-            text=seg_data["text"],
-            wxtext=seg_data["wxtext"],
-            englishtext=seg_data["englishtext"],
-        )
-
-        db.session.add(segment)
-        db.session.flush()
-
-        created.append(
-            {
-                "id": segment.id,
-                "segment_id": segment.segment_id,
-                "text": segment.text,
-                "wxtext": segment.wxtext,
-                "englishtext": segment.englishtext,
-            }
-        )
+    # Create them with one multi-row INSERT ... RETURNING
+    rows = [
+        {
+            "sentence_id": sentence_id,
+            "segment_id": seg_data["segment_id"],
+            "text": seg_data["text"],
+            "wxtext": seg_data["wxtext"],
+            "englishtext": seg_data["englishtext"],
+            "source_hash": segment_source_hash(seg_data),
+        }
+        for seg_data in segments
+    ]
+    segment_ids = insert_returning_ids(Segment, rows)
+    created = [
+        {
+            "id": segment_id,
+            "segment_id": row["segment_id"],
+            "text": row["text"],
+            "wxtext": row["wxtext"],
+            "englishtext": row["englishtext"],
+        }
+        for segment_id, row in zip(segment_ids, rows)
+    ]
 
+    if created:
+        adjust_segment_progress(created[0]["id"], segments=len(created))
     db.session.commit()
     return jsonify(
         {"msg": f"{len(created)} segments added successfully", "segments": created}
@@ -737,7 +989,10 @@ def delete_segment(segment_id):
 
     try:
         # Will cascade to USRs and assignments
+        chapter = chapter_of_segment(segment.id)
         db.session.delete(segment)
+        if chapter:
+            recompute_progress(chapter.project_id, [chapter.id])
         db.session.commit()
         return jsonify({"msg": "Segment and all its USRs deleted successfully"})
     except Exception as e:
@@ -756,7 +1011,9 @@ def get_segment_usrs(segment_id):
     if not segment:
         return jsonify({"msg": "Segment not found"}), 404
 
-    usrs = USR.query.filter_by(segment_id=segment_id).all()
+    usrs = (
+        USR.query.options(*usr_layer_loaders()).filter_by(segment_id=segment_id).all()
+    )
     return jsonify(
         [
             {
@@ -820,6 +1077,14 @@ def visualize_usr(segment_id):
     if not admin_only():
         return jsonify({"msg": "Admin privileges required"}), 403
 
+    # ?format=png (default), svg, dot for the Graphviz source or json
+    fmt = request.args.get("format", "png").lower()
+    if fmt not in CONTENT_TYPES:
+        return (
+            jsonify({"msg": f"format must be one of {', '.join(CONTENT_TYPES)}"}),
+            400,
+        )
+
     segment = Segment.query.get(segment_id)
     if not segment:
         return jsonify({"msg": "Segment not found"}), 404
@@ -832,363 +1097,98 @@ def visualize_usr(segment_id):
     usr = usrs[0]
 
     # Generate the USR text in the standard format
-    usr_lines = []
-
-    # Add segment_id header
-    usr_lines.append(f"<segment_id={segment.segment_id}>")
-
-    # Add sentence text (commented)
-    usr_lines.append(f"#{segment.text}")
-
-    # Add lexical info lines
-    for li in sorted(usr.lexical_info, key=lambda x: x.index):
-        line_parts = [
-            li.concept,
-            str(li.index),
-            li.semantic_category if li.semantic_category else "-",
-            li.morpho_semantic if li.morpho_semantic else "-",
-            # Dependency info
-            " ".join(
-                [
-                    f"{di.head_index}:{di.relation}"
-                    for di in sorted(usr.dependency_info, key=lambda x: x.index)
-                    if di.index == li.index
-                ]
-            )
-            or "-",
-            # Discourse/Coref info
-            " ".join(
-                [
-                    f"{dci.head_index}:{dci.relation}"
-                    for dci in sorted(usr.discourse_coref_info, key=lambda x: x.index)
-                    if dci.index == li.index
-                ]
-            )
-            or "-",
-            li.speakers_view if li.speakers_view else "-",
-            # Scope (from sentence_type_info)
-            usr.sentence_type_info[0].scope if usr.sentence_type_info else "-",
-            # Construction info
-            " ".join(
-                [
-                    f"{ci.cxn_index}:{ci.component_type}"
-                    for ci in sorted(usr.construction_info, key=lambda x: x.index)
-                    if ci.index == li.index
-                ]
-            )
-            or "-",
-        ]
-        usr_lines.append("\t".join(line_parts))
+    usr_data = usr_text(usr, segment)
 
-    # Add sentence type markers if present
-    if usr.sentence_type_info and usr.sentence_type_info[0].scope != "neutral":
-        usr_lines.append(f"%{usr.sentence_type_info[0].scope}")
+    # Generate the visualization
+    try:
+        return visualization_response(usr_data, f"usr_{segment_id}", fmt)
+    except Exception as e:
+        return jsonify({"msg": "Error generating visualization", "error": str(e)}), 500
 
-    # Close segment_id
-    usr_lines.append("</segment_id>")
 
-    usr_text = "\n".join(usr_lines)
+@admin_bp.route("/usr/<int:usr_id>/graph", methods=["GET"])
+@jwt_required()
+def get_usr_graph(usr_id):
+    """Nodes, labelled edges and construction clusters for client-side layout."""
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
 
-    # Generate the visualization
-    try:
-        from graphviz import Digraph
-        import tempfile
-        import os
-
-        def generate_visualization(usr_data):
-            # Create a directed graph
-            dot = Digraph(comment="USR Dependency Graph")
-            dot.attr(rankdir="TB")  # Top to Bottom layout
-            dot.attr("node", shape="box", style="rounded")
-
-            # First parse all nodes and store their info
-            nodes = {}
-            hindi_words = {}
-            construction_nodes = set()
-
-            for line in usr_data.split("\n"):
-                line = line.strip()
-                if not line or line.startswith(("#", "<", "%", "//")):
-                    if line.startswith("#"):  # Hindi words line
-                        hindi_words = {
-                            i + 1: word for i, word in enumerate(line[1:].split("\t"))
-                        }
-                    continue
-
-                parts = line.split()
-                if not parts:
-                    continue
-
-                node_id = parts[0]
-                node_index = int(parts[1])
-
-                # Check if this is a construction concept
-                is_construction = node_id.startswith("[") and node_id.endswith("]")
-                if is_construction:
-                    construction_nodes.add(node_index)
-
-                nodes[node_index] = {
-                    "id": f"{node_id}_{node_index}",
-                    "original_id": node_id,
-                    "deps": [],
-                    "word": hindi_words.get(node_index, node_id.split("_")[0]),
-                    "is_construction": is_construction,
-                }
+    usr = USR.query.get(usr_id)
+    if not usr:
+        return jsonify({"msg": "USR not found"}), 404
 
-                # Check column 5 (index 4) for dependencies
-                if len(parts) > 4 and parts[4] != "-":
-                    for dep_rel in parts[4].split():
-                        if ":" in dep_rel:
-                            head, rel = dep_rel.split(":")
-                            if head.isdigit() or head == "0":
-                                head_node = int(head) if head != "0" else "ROOT"
-                                nodes[node_index]["deps"].append((head_node, rel))
-
-                # Check column 9 (index 8) for construction relations
-                if len(parts) > 8 and parts[8] != "-":
-                    for const_rel in parts[8].split():
-                        if ":" in const_rel:
-                            head, rel = const_rel.split(":")
-                            if head.isdigit():
-                                nodes[node_index]["deps"].append((int(head), rel))
-
-            # Add nodes to the graph
-            for idx, node in nodes.items():
-                if not node["is_construction"]:
-                    dot.node(node["id"], label=f"{node['original_id']}\n{node['word']}")
-
-            # Color palette for construction boxes
-            construction_colors = ["#FFF2CC", "#D5E8D4", "#DAE8FC", "#E1D5E7"]
-
-            # Create clusters for construction concepts
-            for color_idx, constr_index in enumerate(construction_nodes):
-                # Find all nodes related to this construction
-                related_nodes = {constr_index}
-                for idx, node in nodes.items():
-                    for head_idx, _ in node["deps"]:
-                        if head_idx == constr_index:
-                            related_nodes.add(idx)
-
-                # Get color
-                box_color = construction_colors[color_idx % len(construction_colors)]
-
-                # Create a subgraph for this construction
-                with dot.subgraph(name=f"cluster_{constr_index}") as c:
-                    c.attr(
-                        style="filled,rounded,dotted",
-                        color="gray50",
-                        fillcolor=box_color,
-                        label=nodes[constr_index]["original_id"],
-                        fontcolor="black",
-                        penwidth="2",
-                    )
-                    for node_idx in related_nodes:
-                        node = nodes[node_idx]
-                        c.node(
-                            node["id"], label=f"{node['original_id']}\n{node['word']}"
-                        )
-
-            # Add edges based on dependencies
-            for idx, node in nodes.items():
-                for head_idx, rel in node["deps"]:
-                    if head_idx == "ROOT":
-                        continue
-                    head_id = nodes[head_idx]["id"]
-                    dot.edge(head_id, node["id"], label=rel)
-
-            return dot
-
-        # Generate the graph
-        dot = generate_visualization(usr_text)
-
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-            temp_path = tmp.name
-
-        # Render the graph
-        dot.render(temp_path.replace(".png", ""), format="png", cleanup=True)
-
-        # Read the image data
-        with open(temp_path, "rb") as f:
-            image_data = f.read()
-
-        # Clean up
-        os.unlink(temp_path)
-
-        # Return the image
-        from flask import make_response
-
-        response = make_response(image_data)
-        response.headers.set("Content-Type", "image/png")
-        response.headers.set(
-            "Content-Disposition", "inline", filename=f"usr_{segment_id}.png"
+    try:
+        return visualization_response(
+            usr_text(usr, usr.segment), f"usr_{usr_id}", "json"
         )
-        return response
-
     except Exception as e:
-        return jsonify({"msg": "Error generating visualization", "error": str(e)}), 500
+        return jsonify({"msg": "Error building USR graph", "error": str(e)}), 500
 
 
-def parse_custom_usr_format(raw_data):
-    """Parse the custom USR format with 9 columns, ensuring all concepts appear in all tables."""
-    parsed_data = {
-        "sentence_type": "declarative",  # default sentence type
-        "lexical_info": [],
-        "dependency_info": [],
-        "discourse_coref_info": [],
-        "construction_info": [],
-        "sentence_type_info": {
-            "sentence_type": "declarative",  # will be set by % marker
-            "scope": None,  # scope is per-concept, not global
-        },
-    }
+@admin_bp.route("/chapter/<int:chapter_id>/visualizations.zip", methods=["GET"])
+@jwt_required()
+def get_chapter_visualizations(chapter_id):
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
 
-    lines = raw_data.split("\n")
-    segment_id = None
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        # Handle metadata
-        if line.startswith("<segment_id="):
-            segment_id = line[12:-1].strip()
-            continue
-        elif line.startswith("</segment_id>") or line.startswith("#"):
-            continue
-        elif line.startswith("%"):
-            # This sets the overall sentence type
-            marker = line[1:].lower().strip()
-            if marker in ["affirmative", "negative", "interrogative"]:
-                parsed_data["sentence_type"] = marker
-                parsed_data["sentence_type_info"]["sentence_type"] = marker
-            continue
-
-        # Process token lines (9 columns)
-        columns = line.split("\t")
-        if len(columns) < 9:
-            continue
-
-        # Get the full concept name from the first column (don't split it)
-        concept_full = columns[0].strip()
-
-        # Handle index (required field)
-        try:
-            index = (
-                int(columns[1].strip())
-                if columns[1].strip() and columns[1].strip() != "-"
-                else 0
-            )
-        except ValueError:
-            index = 0
-
-        # --- LEXICAL INFO ---
-        lexical_item = {
-            "concept": concept_full,
-            "index": index,
-            "semantic_category": (
-                columns[2].strip() if columns[2].strip() != "-" else None
-            ),
-            "morpho_semantic": (
-                columns[3].strip() if columns[3].strip() != "-" else None
-            ),
-            "speakers_view": columns[6].strip() if columns[6].strip() != "-" else None,
-            "scope": (
-                columns[7].strip() if columns[7].strip() != "-" else None
-            ),  # Scope from column 7
-        }
-        parsed_data["lexical_info"].append(lexical_item)
-
-        # --- DEPENDENCY INFO ---
-        dep_relations = []
-        if columns[4].strip() != "-":
-            for dep_rel in columns[4].strip().split():
-                if ":" in dep_rel:
-                    head, relation = dep_rel.split(":", 1)
-                    try:
-                        head_index = int(head) if head and head != "-" else None
-                        dep_relations.append((head_index, relation))
-                    except ValueError:
-                        continue
-
-        # If no relations, add a default entry
-        if not dep_relations:
-            dep_relations.append((None, "-"))
-
-        for head_index, relation in dep_relations:
-            parsed_data["dependency_info"].append(
-                {
-                    "concept": concept_full,
-                    "index": index,
-                    "head_index": head_index,
-                    "relation": relation,
-                }
-            )
+    fmt = request.args.get("format", "png").lower()
+    if fmt not in ["png", "svg"]:
+        return jsonify({"msg": "format must be png or svg"}), 400
 
-        # --- DISCOURSE/COREF INFO ---
-        coref_relations = []
-        if columns[5].strip() != "-":
-            for coref_rel in columns[5].strip().split():
-                if ":" in coref_rel:
-                    head, relation = coref_rel.split(":", 1)
-                    try:
-                        head_index = int(head) if head and head != "-" else None
-                        coref_relations.append((head_index, relation))
-                    except ValueError:
-                        continue
-
-        # If no relations, add a default entry
-        if not coref_relations:
-            coref_relations.append((None, "-"))
-
-        for head_index, relation in coref_relations:
-            parsed_data["discourse_coref_info"].append(
-                {
-                    "concept": concept_full,
-                    "index": index,
-                    "head_index": head_index,
-                    "relation": relation,
-                }
-            )
+    chapter = Chapter.query.get(chapter_id)
+    if not chapter:
+        return jsonify({"msg": "Chapter not found"}), 404
 
-        # --- CONSTRUCTION INFO ---
-        const_relations = []
-        if columns[8].strip() != "-":
-            for const_rel in columns[8].strip().split():
-                if ":" in const_rel:
-                    cxn_index, component = const_rel.split(":", 1)
-                    try:
-                        cxn_index = (
-                            int(cxn_index) if cxn_index and cxn_index != "-" else None
-                        )
-                        const_relations.append((cxn_index, component))
-                    except ValueError:
-                        continue
-
-        # If no relations, add a default entry
-        if not const_relations:
-            const_relations.append((None, "-"))
-
-        for cxn_index, component in const_relations:
-            parsed_data["construction_info"].append(
-                {
-                    "concept": concept_full,
-                    "index": index,
-                    "cxn_index": cxn_index,
-                    "component_type": component,
-                }
-            )
+    rows = db.session.execute(
+        select(USR, Segment)
+        .join(USR.segment)
+        .join(Segment.sentence)
+        .where(Sentence.chapter_id == chapter_id)
+        .order_by(Sentence.id, Segment.id, USR.id)
+    ).all()
+    entries = [
+        (f"{segment.segment_id or segment.id}_usr_{usr.id}", usr_text(usr, segment))
+        for usr, segment in rows
+    ]
+
+    response = Response(
+        stream_with_context(stream_visualization_zip(entries, fmt)),
+        mimetype="application/zip",
+    )
+    response.headers.set(
+        "Content-Disposition",
+        "attachment",
+        filename=f"chapter_{chapter_id}_visualizations.zip",
+    )
+    return response
 
-    return parsed_data
+
+@admin_bp.route("/visualization/metrics", methods=["GET"])
+@jwt_required()
+def get_visualization_metrics():
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    return jsonify(
+        {"render_pool": render_pool.stats(), "cache": visualization_cache.stats()}
+    )
 
 
 @admin_bp.route("/usr/<int:segment_id>", methods=["POST"])
 @jwt_required()
 def create_usr(segment_id):
+    """Create the USR of a segment, or update it from a changed import.
+
+    Posting the same USR again leaves the existing one untouched instead of
+    creating a duplicate; posting a changed one rewrites it.
+    """
     if not admin_only():
         return jsonify({"msg": "Admin privileges required"}), 403
 
+    segment = Segment.query.get(segment_id)
+    if not segment:
+        return jsonify({"msg": "Segment not found"}), 404
+
     data = request.json
 
     # Check if this is a custom format request
@@ -1198,86 +1198,28 @@ def create_usr(segment_id):
         except Exception as e:
             return jsonify({"msg": f"Error parsing custom format: {str(e)}"}), 400
 
-    # Create USR first
-    usr = USR(
-        segment_id=segment_id,
-        sentence_type=data.get("sentence_type", "declarative"),
-        status="Pending",
-    )
-    db.session.add(usr)
-    db.session.flush()  # Get the USR ID
-
-    # Add Lexical Info (always exists for each concept)
-    for lex_item in data.get("lexical_info", []):
-        lex = LexicalInfo(
-            usr_id=usr.id,
-            concept=lex_item["concept"],
-            index=lex_item["index"],
-            semantic_category=lex_item.get("semantic_category"),
-            morpho_semantic=lex_item.get("morpho_semantic"),
-            speakers_view=lex_item.get("speakers_view"),
-        )
-        db.session.add(lex)
-
-    # Add Dependency Info (always exists for each concept)
-    for dep_item in data.get("dependency_info", []):
-        dep = DependencyInfo(
-            usr_id=usr.id,
-            concept=dep_item["concept"],
-            index=dep_item["index"],
-            head_index=(
-                str(dep_item["head_index"])
-                if dep_item["head_index"] is not None
-                else None
-            ),
-            relation=dep_item["relation"],
-        )
-        db.session.add(dep)
-
-    # Add Discourse/Coref Info (always exists for each concept)
-    for disc_item in data.get("discourse_coref_info", []):
-        disc = DiscourseCorefInfo(
-            usr_id=usr.id,
-            concept=disc_item["concept"],
-            index=disc_item["index"],
-            head_index=(
-                str(disc_item["head_index"])
-                if disc_item["head_index"] is not None
-                else None
-            ),
-            relation=disc_item["relation"],
-        )
-        db.session.add(disc)
-
-    # Add Construction Info (always exists for each concept)
-    for const_item in data.get("construction_info", []):
-        const = ConstructionInfo(
-            usr_id=usr.id,
-            concept=const_item["concept"],
-            index=const_item["index"],
-            cxn_index=(
-                str(const_item["cxn_index"])
-                if const_item["cxn_index"] is not None
-                else None
-            ),
-            component_type=const_item["component_type"],
-        )
-        db.session.add(const)
-
-    # Add Sentence Type Info
-    stype = SentenceTypeInfo(
-        usr_id=usr.id,
-        sentence_type=data.get("sentence_type", "declarative"),
-        scope=data.get("sentence_type_info", {}).get("scope"),
-    )
-    db.session.add(stype)
+    try:
+        parsed = prepare_usr(data)
+    except (KeyError, TypeError) as e:
+        return jsonify({"msg": f"Invalid USR data: {str(e)}"}), 400
 
     try:
+        [(status, detail)] = sync_usrs([(segment, parsed)])
+        if status == "skipped":
+            db.session.rollback()
+            return jsonify({"msg": f"USR not created: {detail}"}), 409
+        if status == "created":
+            adjust_segment_progress(segment_id, usrs=1)
         db.session.commit()
         return jsonify(
             {
-                "msg": "USR created with all components",
-                "usr_id": usr.id,
+                "msg": {
+                    "created": "USR created with all components",
+                    "updated": "USR updated with all components",
+                    "unchanged": "USR unchanged",
+                }[status],
+                "usr_id": detail,
+                "status": status,
                 "lexical_count": len(data.get("lexical_info", [])),
                 "dependency_count": len(data.get("dependency_info", [])),
                 "discourse_count": len(data.get("discourse_coref_info", [])),
@@ -1290,13 +1232,161 @@ def create_usr(segment_id):
         return jsonify({"msg": "Error creating USR", "error": str(e)}), 500
 
 
+def usr_import_upload():
+    """Return the uploaded USR file of the current request as a binary stream.
+
+    Multipart uploads and text/plain bodies are read as they arrive instead
+    of being loaded into one string. Returns None if no file was sent.
+    """
+    if "file" in request.files:
+        return request.files["file"].stream
+    if request.content_type == "text/plain":
+        if not request.content_length:
+            return None
+        return io.BufferedReader(request.stream)
+
+    raw_text = (request.get_json(silent=True) or {}).get("raw_text")
+    return io.BytesIO(raw_text.encode("utf-8")) if raw_text else None
+
+
+def text_upload(stream):
+    """Decode a binary upload stream as UTF-8, iterable line by line.
+
+    A codecs reader only needs ``read()``; TextIOWrapper also calls
+    ``readable()``, which Werkzeug's SpooledTemporaryFile uploads lack
+    before Python 3.11.
+    """
+    return codecs.getreader("utf-8")(stream)
+
+
+def stream_usr_import(imports):
+    """Yield an NDJSON progress record per imported chunk, then the totals."""
+    totals = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+    blocks_read = 0
+    for entries in imports:
+        blocks_read += len(entries)
+        for entry in entries:
+            totals[entry["status"]] += 1
+        yield json.dumps(
+            {
+                "type": "progress",
+                "blocks_read": blocks_read,
+                **totals,
+                "blocks": entries,
+            }
+        ) + "\n"
+
+    yield json.dumps({"type": "done", "blocks_read": blocks_read, **totals}) + "\n"
+
+
+# Failed blocks kept on a finished USR import job
+USR_IMPORT_JOB_MAX_FAILURES = 1000
+
+
+def usr_import_job(job, path, options):
+    totals = Counter()
+    failures = []
+    blocks_read = 0
+    with open(path, encoding="utf-8") as lines:
+        for entries in iter_usr_import(iter_usr_blocks(lines), **options):
+            blocks_read += len(entries)
+            totals.update(entry["status"] for entry in entries)
+            failures.extend(entry for entry in entries if entry["status"] == "failed")
+            del failures[USR_IMPORT_JOB_MAX_FAILURES:]
+            job.progress(blocks_read, counts={"blocks_read": blocks_read, **totals})
+
+    return {"blocks_read": blocks_read, **totals, "failed_blocks": failures}
+
+
+@admin_bp.route("/usr/import", methods=["POST"])
+@jwt_required()
+def import_usrs():
+    """Create or update USRs from a corpus file of ``<segment_id=...>`` blocks.
+
+    The file is sent as a multipart ``file`` upload, a text/plain body or
+    JSON ``raw_text``. Each block is matched to its segment by the
+    ``segment_id`` label, optionally limited to ``?chapter_id=`` or
+    ``?project_id=``. USRs already imported from the same block are left
+    alone and only changed blocks are rewritten, so re-importing a corpus is
+    safe. With ``?stream=ndjson`` a progress record is sent after every
+    chunk. ``?workers=`` parses blocks in that many processes (at most one
+    per CPU). ``?async=true`` runs the import as a job.
+    """
+    admin = admin_only()
+    if not admin:
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    stream = request.args.get("stream")
+    if stream and stream != "ndjson":
+        return jsonify({"msg": "Unsupported stream format"}), 400
+
+    chunk_size = request.args.get(
+        "chunk_size", current_app.config["USR_IMPORT_CHUNK_SIZE"], type=int
+    )
+    if chunk_size < 1:
+        return jsonify({"msg": "chunk_size must be positive"}), 400
+
+    workers = request.args.get(
+        "workers", current_app.config["USR_IMPORT_WORKERS"], type=int
+    )
+    if workers < 1:
+        return jsonify({"msg": "workers must be positive"}), 400
+
+    upload = usr_import_upload()
+    if upload is None:
+        return jsonify({"msg": "USR file required"}), 400
+
+    options = {
+        "chapter_id": request.args.get("chapter_id", type=int),
+        "project_id": request.args.get("project_id", type=int),
+        "chunk_size": chunk_size,
+        "workers": min(workers, os.cpu_count() or 1),
+    }
+    if async_requested():
+        path = job_runner.spool(upload, ".usr")
+        job = job_runner.submit(
+            "usr_import",
+            usr_import_job,
+            args=(path, options),
+            params=options,
+            files=[path],
+            created_by=admin.id,
+        )
+        return job_accepted(job)
+
+    lines = text_upload(upload)
+    if stream:
+        return Response(
+            stream_with_context(
+                stream_usr_import(iter_usr_import(iter_usr_blocks(lines), **options))
+            ),
+            mimetype="application/x-ndjson",
+        )
+
+    try:
+        report = import_usr_blocks(iter_usr_blocks(lines), **options)
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({"msg": "USR file must be UTF-8 encoded"}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error importing USRs: {str(e)}")
+        return jsonify({"msg": "Error importing USRs", "error": str(e)}), 500
+    report["msg"] = (
+        f"{report['created']} USRs created, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['skipped']} skipped, "
+        f"{report['failed']} failed"
+    )
+    return jsonify(report)
+
+
 @admin_bp.route("/usr/<int:usr_id>", methods=["GET"])
 @jwt_required()
 def get_usr(usr_id):
     if not admin_only():
         return jsonify({"msg": "Admin privileges required"}), 403
 
-    usr = USR.query.get(usr_id)
+    usr = USR.query.options(*usr_layer_loaders()).filter_by(id=usr_id).first()
     if not usr:
         return jsonify({"msg": "USR not found"}), 404
 
@@ -1373,7 +1463,10 @@ def delete_usr(usr_id):
 
     try:
         # Will cascade to all info tables and assignments
+        chapter = chapter_of_segment(usr.segment_id)
         db.session.delete(usr)
+        if chapter:
+            recompute_progress(chapter.project_id, [chapter.id])
         db.session.commit()
         return jsonify({"msg": "USR deleted successfully"})
     except Exception as e:
@@ -1428,6 +1521,11 @@ def assign_usr():
     db.session.add(assignment)
 
     try:
+        adjust_segment_progress(
+            usr.segment_id,
+            assigned=1,
+            **status_deltas(None, assignment.annotation_status),
+        )
         db.session.commit()
         return jsonify({"msg": "USR assigned successfully"})
     except Exception as e:
@@ -1573,6 +1671,7 @@ def update_assignment(assignment_id):
         return jsonify({"msg": "Assignment not found"}), 404
 
     data = request.json
+    old_status = assignment.annotation_status
     try:
         if "annotator_id" in data:
             assignment.annotator_id = data["annotator_id"]
@@ -1589,6 +1688,9 @@ def update_assignment(assignment_id):
         if "assign_construction" in data:
             assignment.assign_construction = data["assign_construction"]
 
+        adjust_status_progress(
+            assignment.segment_id, old_status, assignment.annotation_status
+        )
         db.session.commit()
         return jsonify({"msg": "Assignment updated"})
     except Exception as e:
@@ -1608,6 +1710,11 @@ def delete_assignment(assignment_id):
 
     try:
         db.session.delete(assignment)
+        adjust_segment_progress(
+            assignment.segment_id,
+            assigned=-1,
+            **status_deltas(assignment.annotation_status, None),
+        )
         db.session.commit()
         return jsonify({"msg": "Assignment deleted"})
     except Exception as e:
@@ -1616,13 +1723,206 @@ def delete_assignment(assignment_id):
 
 
 # GET FULL HIERARCHY
+HIERARCHY_STREAM_BATCH_SIZE = 500
+
+
+def serialize_hierarchy_usr(usr, segment, include_layers=True):
+    """Serialize a USR, including its rendered text, for the hierarchy views.
+
+    Without layers only the materialized text is read, so the layer tables
+    are not queried.
+    """
+    usr_data = {
+        "id": usr.id,
+        "status": usr.status,
+        "sentence_type": usr.sentence_type,
+        "raw_text": usr_text(
+            usr, segment, tag="sent_id", label=segment.segment_id or usr.id
+        ),
+    }
+    if not include_layers:
+        return usr_data
+
+    usr_data.update(serialize_usr_layers(usr))
+    return usr_data
+
+
+def serialize_hierarchy_segment(segment, usrs):
+    return {
+        "id": segment.id,
+        "text": segment.text,
+        "wxtext": segment.wxtext,
+        "englishtext": segment.englishtext,
+        "segment_id": segment.segment_id,
+        "usrs": usrs,
+    }
+
+
+def stream_project_hierarchy(project, unit, include_layers=True):
+    """Yield the project hierarchy as NDJSON, one record per segment or per USR.
+
+    Rows are read through a server-side cursor in batches of
+    HIERARCHY_STREAM_BATCH_SIZE, so memory use does not grow with the project.
+    """
+    yield hierarchy_project_record(project)
+    yield from stream_hierarchy_records(project, unit, include_layers)
+
+
+def hierarchy_project_record(project):
+    return (
+        json.dumps(
+            {
+                "type": "project",
+                "project": {
+                    "id": project.id,
+                    "title": project.title,
+                    "description": project.description,
+                },
+            },
+            ensure_ascii=False,
+        )
+        + "\n"
+    )
+
+
+def stream_hierarchy_records(project, unit, include_layers=True, chapter_id=None):
+    """Yield the segment or USR records of stream_project_hierarchy.
+
+    ``chapter_id`` limits them to one chapter of the project.
+    """
+    if unit == "usr":
+        query = select(USR, Segment, Sentence, Chapter).join(USR.segment)
+    else:
+        query = select(Segment, Sentence, Chapter)
+    query = (
+        query.join(Segment.sentence)
+        .join(Sentence.chapter)
+        .where(Chapter.project_id == project.id)
+        .order_by(Chapter.id, Sentence.id, Segment.id)
+    )
+    if chapter_id is not None:
+        query = query.where(Chapter.id == chapter_id)
+    if unit == "usr":
+        query = query.order_by(USR.id)
+        if include_layers:
+            query = query.options(*usr_layer_loaders())
+    else:
+        query = query.options(*segment_usr_loaders(include_layers))
+    query = query.execution_options(yield_per=HIERARCHY_STREAM_BATCH_SIZE)
+
+    for row in db.session.execute(query):
+        if unit == "usr":
+            usr, segment, sentence, chapter = row
+        else:
+            segment, sentence, chapter = row
+
+        record = {
+            "type": unit,
+            "chapter": {"id": chapter.id, "title": chapter.title},
+            "sentence": {
+                "id": sentence.id,
+                "text": sentence.text,
+                "sentence_id": sentence.sentence_id,
+            },
+        }
+        if unit == "usr":
+            record["segment"] = {
+                "id": segment.id,
+                "segment_id": segment.segment_id,
+                "text": segment.text,
+            }
+            record["usr"] = serialize_hierarchy_usr(usr, segment, include_layers)
+        else:
+            record["segment"] = serialize_hierarchy_segment(
+                segment,
+                [
+                    serialize_hierarchy_usr(usr, segment, include_layers)
+                    for usr in segment.usrs
+                ],
+            )
+
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def hierarchy_export_job(job, project_id, unit, include_layers):
+    project = db.session.get(Project, project_id)
+    if not project:
+        raise ValueError("Project not found")
+
+    output_path = db.session.get(Job, job.job_id).output_path
+    chapter_ids = db.session.scalars(
+        select(Chapter.id).where(Chapter.project_id == project.id).order_by(Chapter.id)
+    ).all()
+
+    # One query per chapter, so progress is reported while no cursor is open
+    records = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write(hierarchy_project_record(project))
+        for chapter_id in chapter_ids:
+            for line in stream_hierarchy_records(
+                project, unit, include_layers, chapter_id
+            ):
+                out.write(line)
+                records += 1
+            job.progress(records)
+
+    return {"records": records, "chapters": len(chapter_ids)}
+
+
 @admin_bp.route("/project/<int:project_id>/hierarchy", methods=["GET"])
 @jwt_required()
 def get_project_hierarchy(project_id):
-    if not admin_only():
+    admin = admin_only()
+    if not admin:
         return jsonify({"msg": "Admin privileges required"}), 403
 
-    project = Project.query.get(project_id)
+    # ?layers=false returns only the materialized raw_text for each USR
+    include_layers = request.args.get("layers", "true").lower() != "false"
+
+    # ?stream=ndjson returns one JSON record per line instead of a nested tree
+    stream = request.args.get("stream")
+    # ?async=true writes the NDJSON records to a file in a background job
+    if async_requested():
+        stream = stream or "ndjson"
+    if stream:
+        if stream != "ndjson":
+            return jsonify({"msg": "Unsupported stream format"}), 400
+
+        unit = request.args.get("unit", "segment")
+        if unit not in ["segment", "usr"]:
+            return jsonify({"msg": "unit must be 'segment' or 'usr'"}), 400
+
+        project = Project.query.get(project_id)
+        if not project:
+            return jsonify({"msg": "Project not found"}), 404
+
+        if async_requested():
+            job = job_runner.submit(
+                "project_export",
+                hierarchy_export_job,
+                args=(project.id, unit, include_layers),
+                params={
+                    "project_id": project.id,
+                    "unit": unit,
+                    "layers": include_layers,
+                },
+                output_path=job_runner.spool_path(".ndjson"),
+                created_by=admin.id,
+            )
+            return job_accepted(job)
+
+        return Response(
+            stream_with_context(
+                stream_project_hierarchy(project, unit, include_layers)
+            ),
+            mimetype="application/x-ndjson",
+        )
+
+    project = (
+        Project.query.options(*project_hierarchy_loaders(include_layers))
+        .filter_by(id=project_id)
+        .first()
+    )
     if not project:
         return jsonify({"msg": "Project not found"}), 404
 
@@ -1632,138 +1932,11 @@ def get_project_hierarchy(project_id):
         for sentence in chapter.sentences:
             segments = []
             for segment in sentence.segments:
-                usrs = []
-                for usr in segment.usrs:
-                    # Build the custom USR format string
-                    usr_lines = []
-
-                    # Add sent_id header
-                    usr_lines.append(f"<sent_id={segment.segment_id or usr.id}>")
-
-                    # Add sentence text (commented)
-                    usr_lines.append(f"#{segment.text}")
-
-                    # Add lexical info lines
-                    for li in usr.lexical_info:
-                        line_parts = [
-                            li.concept,
-                            str(li.index),
-                            li.semantic_category if li.semantic_category else "-",
-                            li.morpho_semantic if li.morpho_semantic else "-",
-                            # Dependency info
-                            " ".join(
-                                [
-                                    f"{di.head_index}:{di.relation}"
-                                    for di in usr.dependency_info
-                                    if di.index == li.index
-                                ]
-                            )
-                            or "-",
-                            # Discourse/Coref info
-                            " ".join(
-                                [
-                                    f"{dci.head_index}:{dci.relation}"
-                                    for dci in usr.discourse_coref_info
-                                    if dci.index == li.index
-                                ]
-                            )
-                            or "-",
-                            li.speakers_view if li.speakers_view else "-",
-                            # Scope (from sentence_type_info)
-                            (
-                                usr.sentence_type_info[0].scope
-                                if usr.sentence_type_info
-                                else "-"
-                            ),
-                            # Construction info
-                            " ".join(
-                                [
-                                    f"{ci.cxn_index}:{ci.component_type}"
-                                    for ci in usr.construction_info
-                                    if ci.index == li.index
-                                ]
-                            )
-                            or "-",
-                        ]
-                        usr_lines.append("\t".join(line_parts))
-
-                    # Add sentence type markers if present
-                    if (
-                        usr.sentence_type_info
-                        and usr.sentence_type_info[0].scope != "neutral"
-                    ):
-                        usr_lines.append(f"%{usr.sentence_type_info[0].scope}")
-
-                    # Close sent_id
-                    usr_lines.append("</sent_id>")
-
-                    # Join all lines with newlines
-                    usr_text = "\n".join(usr_lines)
-
-                    usrs.append(
-                        {
-                            "id": usr.id,
-                            "status": usr.status,
-                            "sentence_type": usr.sentence_type,
-                            "raw_text": usr_text,
-                            "lexical_info": [
-                                {
-                                    "concept": li.concept,
-                                    "index": li.index,
-                                    "semantic_category": li.semantic_category,
-                                    "morpho_semantic": li.morpho_semantic,
-                                    "speakers_view": li.speakers_view,
-                                }
-                                for li in usr.lexical_info
-                            ],
-                            "dependency_info": [
-                                {
-                                    "concept": di.concept,
-                                    "index": di.index,
-                                    "head_index": di.head_index,
-                                    "relation": di.relation,
-                                }
-                                for di in usr.dependency_info
-                            ],
-                            "discourse_coref_info": [
-                                {
-                                    "concept": dci.concept,
-                                    "index": dci.index,
-                                    "head_index": dci.head_index,
-                                    "relation": dci.relation,
-                                }
-                                for dci in usr.discourse_coref_info
-                            ],
-                            "construction_info": [
-                                {
-                                    "concept": ci.concept,
-                                    "index": ci.index,
-                                    "cxn_index": ci.cxn_index,
-                                    "component_type": ci.component_type,
-                                }
-                                for ci in usr.construction_info
-                            ],
-                            "sentence_type_info": {
-                                "sentence_type": usr.sentence_type,
-                                "scope": (
-                                    usr.sentence_type_info[0].scope
-                                    if usr.sentence_type_info
-                                    else "neutral"
-                                ),
-                            },
-                        }
-                    )
-
-                segments.append(
-                    {
-                        "id": segment.id,
-                        "text": segment.text,
-                        "wxtext": segment.wxtext,
-                        "englishtext": segment.englishtext,
-                        "segment_id": segment.segment_id,
-                        "usrs": usrs,
-                    }
-                )
+                usrs = [
+                    serialize_hierarchy_usr(usr, segment, include_layers)
+                    for usr in segment.usrs
+                ]
+                segments.append(serialize_hierarchy_segment(segment, usrs))
 
             sentences.append(
                 {
@@ -1788,3 +1961,140 @@ def get_project_hierarchy(project_id):
             }
         }
     )
+
+
+@admin_bp.route("/concepts/import", methods=["POST"])
+@jwt_required()
+def import_concepts():
+    """Upsert concepts from a CSV file, see app.concept_loader.
+
+    The CSV is sent as a multipart ``file`` upload or a text/csv body.
+    ``?chunk_size=`` sets the rows per transaction, ``?copy=true`` loads it
+    with COPY on PostgreSQL and ``?async=true`` runs the load as a job.
+    """
+    admin = admin_only()
+    if not admin:
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    chunk_size = request.args.get("chunk_size", CONCEPT_LOAD_CHUNK_SIZE, type=int)
+    if chunk_size < 1:
+        return jsonify({"msg": "chunk_size must be positive"}), 400
+
+    use_copy = request.args.get("copy", "false").lower() == "true"
+    if use_copy and db.engine.dialect.name != "postgresql":
+        return jsonify({"msg": "copy needs a PostgreSQL database"}), 400
+
+    if "file" in request.files:
+        upload = request.files["file"].stream
+    elif request.content_type == "text/csv" and request.content_length:
+        upload = io.BufferedReader(request.stream)
+    else:
+        return jsonify({"msg": "CSV file required"}), 400
+
+    # Spooled to a real file so the csv module gets its newline="" semantics
+    path = job_runner.spool(upload, ".csv")
+    if async_requested():
+        job = job_runner.submit(
+            "concept_load",
+            concept_load_job,
+            args=(path, chunk_size, use_copy),
+            params={"chunk_size": chunk_size, "copy": use_copy},
+            files=[path],
+            created_by=admin.id,
+        )
+        return job_accepted(job)
+
+    try:
+        with open(path, encoding="utf-8", newline="") as csvfile:
+            if use_copy:
+                stats = copy_concepts(csvfile)
+            else:
+                stats = load_concepts(csvfile, chunk_size)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error loading concepts: {str(e)}")
+        return jsonify({"msg": "Error loading concepts", "error": str(e)}), 500
+    finally:
+        os.remove(path)
+
+    return jsonify({"msg": f"{stats['rows']} concepts loaded", **stats})
+
+
+def concept_load_job(job, path, chunk_size, use_copy):
+    def progress(rows, seconds):
+        job.progress(rows)
+
+    with open(path, encoding="utf-8", newline="") as csvfile:
+        if use_copy:
+            return copy_concepts(csvfile, progress)
+        return load_concepts(csvfile, chunk_size, progress)
+
+
+@admin_bp.route("/jobs", methods=["GET"])
+@jwt_required()
+def get_jobs():
+    """List background jobs, newest first, optionally by ``?status=``/``?kind=``."""
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    query = Job.query.order_by(Job.id.desc())
+    status = request.args.get("status")
+    if status:
+        if status not in JOB_STATUSES:
+            return jsonify({"msg": f"status must be one of {JOB_STATUSES}"}), 400
+        query = query.filter(Job.status == status)
+    if request.args.get("kind"):
+        query = query.filter(Job.kind == request.args["kind"])
+
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+    return jsonify({"jobs": [serialize_job(job) for job in query.limit(limit)]})
+
+
+@admin_bp.route("/job/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"msg": "Job not found"}), 404
+    return jsonify(serialize_job(job))
+
+
+@admin_bp.route("/job/<int:job_id>/cancel", methods=["POST"])
+@jwt_required()
+def cancel_background_job(job_id):
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"msg": "Job not found"}), 404
+    if not cancel_job(job):
+        return jsonify({"msg": f"Job already {job.status}", **serialize_job(job)}), 409
+    msg = "Job cancelled" if job.status == "cancelled" else "Cancellation requested"
+    return jsonify({"msg": msg, **serialize_job(job)})
+
+
+@admin_bp.route("/job/<int:job_id>/output", methods=["GET"])
+@jwt_required()
+def get_job_output(job_id):
+    if not admin_only():
+        return jsonify({"msg": "Admin privileges required"}), 403
+
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"msg": "Job not found"}), 404
+    if job.status != "succeeded" or not job.output_path:
+        return jsonify({"msg": "Job has no output"}), 404
+
+    return send_file(
+        job.output_path,
+        mimetype="application/x-ndjson",
+        as_attachment=True,
+        download_name=f"{job.kind}_{job.id}.ndjson",
+    )
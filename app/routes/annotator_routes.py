@@ -1,6 +1,6 @@
 from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, User, USR, Assignment, Segment, Sentence, Chapter, Project
+from app.models import db, User, USR, Assignment, Segment, Chapter, Project
 from app.models import (
     LexicalInfo,
     DependencyInfo,
@@ -8,6 +8,22 @@ from app.models import (
     ConstructionInfo,
     SentenceTypeInfo,
 )
+from app.queries import assignment_hierarchy_query, assignment_status_summary
+from app.progress import adjust_status_progress
+from app.usr_format import usr_text, refresh_usr_render
+from app.usr_patch import (
+    UsrPatchError,
+    apply_usr_patch,
+    bump_usr_version,
+    usr_versions,
+)
+from app.transitions import (
+    SUBMIT_FROM_STATUSES,
+    transition_assignments,
+    transition_selection,
+)
+from app.visualization import CONTENT_TYPES, visualization_response
+from sqlalchemy import func
 
 annotator_bp = Blueprint("annotator", __name__)
 
@@ -20,6 +36,28 @@ def get_current_annotator():
     return user
 
 
+def claim_usr_version(usr_id):
+    """Check the request's If-Match against a USR and bump its version.
+
+    Returns ``(version, None)`` with the USR's new version, or ``(None,
+    response)`` with a 428 if If-Match is missing or a 412 if it is stale.
+    """
+    if not request.if_match:
+        return None, (
+            jsonify({"msg": "If-Match header with the USR ETag required"}),
+            428,
+        )
+
+    version = bump_usr_version(usr_id, usr_versions(request.if_match))
+    if version is None:
+        db.session.rollback()
+        return None, (
+            jsonify({"msg": "USR was changed by someone else, reload it"}),
+            412,
+        )
+    return version, None
+
+
 @annotator_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
 def annotator_dashboard():
@@ -27,88 +65,94 @@ def annotator_dashboard():
     if not annotator:
         return jsonify({"msg": "Annotator access required"}), 403
 
-    # Get all assignments for this annotator
-    assignments = Assignment.query.filter_by(annotator_id=annotator.id).all()
-
-    # Create a dictionary to organize data hierarchically
-    projects_dict = {}
-
-    for assignment in assignments:
-        usr = USR.query.get(assignment.usr_id)
-        if not usr:
-            continue
-
-        segment = Segment.query.get(assignment.segment_id)
-        if not segment:
-            continue
-
-        sentence = Sentence.query.get(segment.sentence_id)
-        if not sentence:
-            continue
-
-        chapter = Chapter.query.get(sentence.chapter_id)
-        if not chapter:
-            continue
-
-        project = Project.query.get(chapter.project_id)
-        if not project:
-            continue
-
-        # Prepare assignment data
-        assignment_data = {
-            "assignment_id": assignment.id,
-            "segment_id": segment.id,
-            "segment_text": segment.text,
-            "usr_id": usr.id,
-            "status": assignment.annotation_status,
-            "sentence_type": usr.sentence_type,
-            "can_edit_lexical": assignment.assign_lexical,
-            "can_edit_dependency": assignment.assign_dependency,
-            "can_edit_discourse": assignment.assign_discourse,
-            "can_edit_construction": assignment.assign_construction,
-        }
-
-        # Build hierarchical structure
-        if project.id not in projects_dict:
-            projects_dict[project.id] = {
-                "id": project.id,
-                "title": project.title,
-                "chapters": {},
+    query = assignment_hierarchy_query(
+        Assignment.id,
+        Assignment.annotation_status,
+        Assignment.assign_lexical,
+        Assignment.assign_dependency,
+        Assignment.assign_discourse,
+        Assignment.assign_construction,
+        Segment.id.label("segment_id"),
+        Segment.text.label("segment_text"),
+        USR.id.label("usr_id"),
+        USR.sentence_type,
+        Chapter.id.label("chapter_id"),
+        Chapter.title.label("chapter_title"),
+        Project.id.label("project_id"),
+        Project.title.label("project_title"),
+        func.count().over().label("total"),
+    ).filter(Assignment.annotator_id == annotator.id)
+
+    status = request.args.get("status")
+    if status:
+        query = query.filter(Assignment.annotation_status == status)
+
+    query = query.order_by(Project.id, Chapter.id, Assignment.id)
+
+    # Optional pagination; the page size is reported in response headers
+    page = request.args.get("page", type=int)
+    per_page = request.args.get("per_page", 100, type=int)
+    if page is not None:
+        if page < 1 or per_page < 1:
+            return jsonify({"msg": "page and per_page must be positive"}), 400
+        query = query.limit(per_page).offset((page - 1) * per_page)
+
+    rows = query.all()
+
+    # Rows arrive ordered by project and chapter, so one pass builds the tree
+    projects_list = []
+    project_data = chapter_data = None
+    for row in rows:
+        if project_data is None or project_data["id"] != row.project_id:
+            project_data = {
+                "id": row.project_id,
+                "title": row.project_title,
+                "chapters": [],
             }
+            projects_list.append(project_data)
+            chapter_data = None
 
-        if chapter.id not in projects_dict[project.id]["chapters"]:
-            projects_dict[project.id]["chapters"][chapter.id] = {
-                "id": chapter.id,
-                "title": chapter.title,
+        if chapter_data is None or chapter_data["id"] != row.chapter_id:
+            chapter_data = {
+                "id": row.chapter_id,
+                "title": row.chapter_title,
                 "assignments": [],
             }
+            project_data["chapters"].append(chapter_data)
 
-        projects_dict[project.id]["chapters"][chapter.id]["assignments"].append(
-            assignment_data
-        )
-
-    # Convert to list format for easier frontend handling
-    projects_list = []
-    for project_id, project_data in projects_dict.items():
-        chapters_list = []
-        for chapter_id, chapter_data in project_data["chapters"].items():
-            chapters_list.append(
-                {
-                    "id": chapter_data["id"],
-                    "title": chapter_data["title"],
-                    "assignments": chapter_data["assignments"],
-                }
-            )
-
-        projects_list.append(
+        chapter_data["assignments"].append(
             {
-                "id": project_data["id"],
-                "title": project_data["title"],
-                "chapters": chapters_list,
+                "assignment_id": row.id,
+                "segment_id": row.segment_id,
+                "segment_text": row.segment_text,
+                "usr_id": row.usr_id,
+                "status": row.annotation_status,
+                "sentence_type": row.sentence_type,
+                "can_edit_lexical": row.assign_lexical,
+                "can_edit_dependency": row.assign_dependency,
+                "can_edit_discourse": row.assign_discourse,
+                "can_edit_construction": row.assign_construction,
             }
         )
 
-    return jsonify(projects_list)
+    response = jsonify(projects_list)
+    if page is not None:
+        total = rows[0].total if rows else query.limit(None).offset(None).count()
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Page"] = str(page)
+        response.headers["X-Per-Page"] = str(per_page)
+    return response
+
+
+@annotator_bp.route("/summary", methods=["GET"])
+@jwt_required()
+def annotator_summary():
+    """Assignment counts by project, chapter and annotation status."""
+    annotator = get_current_annotator()
+    if not annotator:
+        return jsonify({"msg": "Annotator access required"}), 403
+
+    return jsonify(assignment_status_summary(Assignment.annotator_id == annotator.id))
 
 
 @annotator_bp.route("/visualize_usr/<int:usr_id>", methods=["GET"])
@@ -118,6 +162,14 @@ def visualize_usr(usr_id):
     if not annotator:
         return jsonify({"msg": "Annotator access required"}), 403
 
+    # ?format=png (default), svg, dot for the Graphviz source or json
+    fmt = request.args.get("format", "png").lower()
+    if fmt not in CONTENT_TYPES:
+        return (
+            jsonify({"msg": f"format must be one of {', '.join(CONTENT_TYPES)}"}),
+            400,
+        )
+
     # Verify this USR is assigned to the current annotator
     assignment = Assignment.query.filter_by(
         usr_id=usr_id, annotator_id=annotator.id
@@ -135,212 +187,47 @@ def visualize_usr(usr_id):
         return jsonify({"msg": "Segment not found"}), 404
 
     # Generate the USR text in the standard format
-    usr_lines = []
-
-    # Add segment_id header
-    usr_lines.append(f"<segment_id={segment.segment_id}>")
-
-    # Add sentence text (commented)
-    usr_lines.append(f"#{segment.text}")
-
-    # Add lexical info lines
-    for li in sorted(usr.lexical_info, key=lambda x: x.index):
-        # Ensure all values are strings and handle None values
-        line_parts = [
-            li.concept or "-",
-            str(li.index) if li.index is not None else "-",
-            li.semantic_category if li.semantic_category else "-",
-            li.morpho_semantic if li.morpho_semantic else "-",
-            # Dependency info
-            " ".join(
-                [
-                    f"{di.head_index}:{di.relation}"
-                    for di in sorted(usr.dependency_info, key=lambda x: x.index)
-                    if di.index == li.index
-                ]
-            )
-            or "-",
-            # Discourse/Coref info
-            " ".join(
-                [
-                    f"{dci.head_index}:{dci.relation}"
-                    for dci in sorted(usr.discourse_coref_info, key=lambda x: x.index)
-                    if dci.index == li.index
-                ]
-            )
-            or "-",
-            li.speakers_view if li.speakers_view else "-",
-            # Scope (from sentence_type_info)
-            (
-                usr.sentence_type_info[0].scope
-                if usr.sentence_type_info and usr.sentence_type_info[0].scope
-                else "-"
-            ),
-            # Construction info
-            " ".join(
-                [
-                    f"{ci.cxn_index}:{ci.component_type}"
-                    for ci in sorted(usr.construction_info, key=lambda x: x.index)
-                    if ci.index == li.index
-                ]
-            )
-            or "-",
-        ]
-        usr_lines.append("\t".join(line_parts))
-
-    # Add sentence type markers if present
-    if usr.sentence_type_info and usr.sentence_type_info[0].scope != "neutral":
-        usr_lines.append(f"%{usr.sentence_type_info[0].scope}")
-
-    # Close segment_id
-    usr_lines.append("</segment_id>")
-
-    usr_text = "\n".join(usr_lines)
+    usr_data = usr_text(usr, segment)
 
     # Generate the visualization
     try:
-        from graphviz import Digraph
-        import tempfile
-        import os
-
-        def generate_visualization(usr_data):
-            from graphviz import Digraph
-
-            dot = Digraph(comment="USR Dependency Graph")
-            dot.attr(rankdir="TB")  # Top to Bottom layout
-            dot.attr("node", shape="box", style="rounded")
-
-            nodes = {}
-            hindi_words = {}
-            construction_nodes = set()
-
-            for line in usr_data.split("\n"):
-                line = line.strip()
-                if not line or line.startswith(("#", "<", "%", "//")):
-                    if line.startswith("#"):  # Hindi words line
-                        # Fix: split Hindi sentence by whitespace instead of tabs
-                        hindi_words = {
-                            i + 1: word
-                            for i, word in enumerate(line[1:].strip().split())
-                        }
-                    continue
-
-                parts = line.split("\t")
-                if len(parts) < 9:
-                    continue
-
-                node_id = parts[0]
-                try:
-                    node_index = int(parts[1]) if parts[1] and parts[1] != "-" else 0
-                except ValueError:
-                    continue
-
-                is_construction = node_id.startswith("[")
-                if is_construction:
-                    construction_nodes.add(node_index)
-
-                nodes[node_index] = {
-                    "id": f"{node_id}_{node_index}",
-                    "original_id": node_id,
-                    "deps": [],
-                    "word": hindi_words.get(node_index, node_id),
-                    "is_construction": is_construction,
-                }
-
-                # Dependency info (column 5)
-                if parts[4] != "-":
-                    for dep_rel in parts[4].split():
-                        if ":" in dep_rel:
-                            head, rel = dep_rel.split(":")
-                            if head.isdigit() or head == "0":
-                                head_node = int(head) if head != "0" else "ROOT"
-                                nodes[node_index]["deps"].append((head_node, rel))
-
-                # Construction info (column 9)
-                if parts[8] != "-":
-                    for const_rel in parts[8].split():
-                        if ":" in const_rel:
-                            head, rel = const_rel.split(":")
-                            if head.isdigit():
-                                nodes[node_index]["deps"].append((int(head), rel))
-
-            clustered_nodes = set()
-
-            # Construction concept clusters
-            construction_colors = ["#FFF2CC", "#D5E8D4", "#DAE8FC", "#E1D5E7"]
-            for color_idx, constr_index in enumerate(construction_nodes):
-                related_nodes = {constr_index}
-                for idx, node in nodes.items():
-                    for head_idx, _ in node["deps"]:
-                        if head_idx == constr_index:
-                            related_nodes.add(idx)
-
-                box_color = construction_colors[color_idx % len(construction_colors)]
-                with dot.subgraph(name=f"cluster_{constr_index}") as c:
-                    c.attr(
-                        style="filled,rounded,dotted",
-                        color="gray50",
-                        fillcolor=box_color,
-                        label=nodes[constr_index]["original_id"],
-                        fontcolor="black",
-                        penwidth="2",
-                    )
-
-                    for node_idx in related_nodes:
-                        node = nodes[node_idx]
-                        clustered_nodes.add(node_idx)
-                        c.node(
-                            node["id"], label=f"{node['original_id']}\n{node['word']}"
-                        )
-
-            # Non-clustered nodes (normal lexical concepts)
-            for idx, node in nodes.items():
-                if idx not in clustered_nodes and not node["is_construction"]:
-                    dot.node(node["id"], label=f"{node['original_id']}\n{node['word']}")
-
-            # Draw edges
-            for idx, node in nodes.items():
-                for head_idx, rel in node["deps"]:
-                    if head_idx == "ROOT":
-                        continue
-                    if head_idx in nodes:
-                        head_id = nodes[head_idx]["id"]
-                        dot.edge(head_id, node["id"], label=rel)
-
-            return dot
-
-        # Generate the graph
-        dot = generate_visualization(usr_text)
-
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-            temp_path = tmp.name
-
-        # Render the graph
-        dot.render(temp_path.replace(".png", ""), format="png", cleanup=True)
-
-        # Read the image data
-        with open(temp_path, "rb") as f:
-            image_data = f.read()
-
-        # Clean up
-        os.unlink(temp_path)
-
-        # Return the image
-        from flask import make_response
-
-        response = make_response(image_data)
-        response.headers.set("Content-Type", "image/png")
-        response.headers.set(
-            "Content-Disposition", "inline", filename=f"usr_{usr_id}.png"
-        )
-        return response
-
+        return visualization_response(usr_data, f"usr_{usr_id}", fmt)
     except Exception as e:
         current_app.logger.error(f"Error generating visualization: {str(e)}")
         return jsonify({"msg": "Error generating visualization", "error": str(e)}), 500
 
 
+@annotator_bp.route("/usr/<int:usr_id>/graph", methods=["GET"])
+@jwt_required()
+def get_usr_graph(usr_id):
+    """Nodes, labelled edges and construction clusters for client-side layout."""
+    annotator = get_current_annotator()
+    if not annotator:
+        return jsonify({"msg": "Annotator access required"}), 403
+
+    # Verify this USR is assigned to the current annotator
+    assignment = Assignment.query.filter_by(
+        usr_id=usr_id, annotator_id=annotator.id
+    ).first()
+
+    if not assignment:
+        return jsonify({"msg": "USR not assigned to you"}), 403
+
+    usr = USR.query.get(usr_id)
+    if not usr:
+        return jsonify({"msg": "USR not found"}), 404
+
+    segment = Segment.query.get(usr.segment_id)
+    if not segment:
+        return jsonify({"msg": "Segment not found"}), 404
+
+    try:
+        return visualization_response(usr_text(usr, segment), f"usr_{usr_id}", "json")
+    except Exception as e:
+        current_app.logger.error(f"Error building USR graph: {str(e)}")
+        return jsonify({"msg": "Error building USR graph", "error": str(e)}), 500
+
+
 @annotator_bp.route("/usr/<int:usr_id>", methods=["GET"])
 @jwt_required()
 def get_assigned_usr(usr_id):
@@ -431,7 +318,7 @@ def get_assigned_usr(usr_id):
             "scope": sti.scope,
         }
 
-    return jsonify(
+    response = jsonify(
         {
             "assignment_id": assignment.id,
             "permissions": {
@@ -448,6 +335,7 @@ def get_assigned_usr(usr_id):
             },
             "usr": {
                 "id": usr.id,
+                "version": usr.version,
                 "sentence_type": usr.sentence_type,
                 "lexical_info": lexical_info if assignment.assign_lexical else [],
                 "dependency_info": (
@@ -463,11 +351,14 @@ def get_assigned_usr(usr_id):
             },
         }
     )
+    response.set_etag(str(usr.version))
+    return response
 
 
 @annotator_bp.route("/usr/<int:usr_id>", methods=["PUT"])
 @jwt_required()
 def update_usr(usr_id):
+    """Replace a USR's layers; needs the USR's ETag from GET in If-Match."""
     annotator = get_current_annotator()
     if not annotator:
         return jsonify({"msg": "Annotator access required"}), 403
@@ -486,6 +377,10 @@ def update_usr(usr_id):
     if not usr:
         return jsonify({"msg": "USR not found"}), 404
 
+    version, error = claim_usr_version(usr_id)
+    if error:
+        return error
+
     try:
         # --- 1️⃣ Update sentence type ---
         if "sentence_type" in data:
@@ -642,16 +537,170 @@ def update_usr(usr_id):
                 )
                 db.session.add(new_sti)
 
+        refresh_usr_render(usr)
+        old_status = assignment.annotation_status
+        assignment.annotation_status = "In Progress"
+        adjust_status_progress(assignment.segment_id, old_status, "In Progress")
+        db.session.commit()
+        response = jsonify({"msg": "USR updated successfully", "version": version})
+        response.set_etag(str(version))
+        return response
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error updating USR: {str(e)}")
+        return jsonify({"msg": "Error updating USR", "error": str(e)}), 500
+
+
+@annotator_bp.route("/usr/<int:usr_id>", methods=["PATCH"])
+@jwt_required()
+def patch_usr(usr_id):
+    """Apply row-level edits to a USR, see app.usr_patch.
+
+    Only the rows named in the patch are written, instead of the whole USR
+    as with PUT. Like PUT, it needs the USR's ETag in If-Match.
+    """
+    annotator = get_current_annotator()
+    if not annotator:
+        return jsonify({"msg": "Annotator access required"}), 403
+
+    assignment = Assignment.query.filter_by(
+        usr_id=usr_id, annotator_id=annotator.id
+    ).first()
+    if not assignment:
+        return jsonify({"msg": "USR not assigned to you"}), 403
+
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({"msg": "No data provided"}), 400
+
+    usr = USR.query.get(usr_id)
+    if not usr:
+        return jsonify({"msg": "USR not found"}), 404
+
+    version, error = claim_usr_version(usr_id)
+    if error:
+        return error
+
+    try:
+        changes = apply_usr_patch(usr, data, assignment)
+
+        refresh_usr_render(usr)
+        old_status = assignment.annotation_status
         assignment.annotation_status = "In Progress"
+        adjust_status_progress(assignment.segment_id, old_status, "In Progress")
         db.session.commit()
-        return jsonify({"msg": "USR updated successfully"})
+        response = jsonify(
+            {"msg": "USR updated successfully", "version": version, **changes}
+        )
+        response.set_etag(str(version))
+        return response
 
+    except UsrPatchError as e:
+        db.session.rollback()
+        msg = "Invalid USR patch" if e.status == 400 else "USR has changed"
+        return jsonify({"msg": msg, "errors": e.errors}), e.status
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error updating USR: {str(e)}")
         return jsonify({"msg": "Error updating USR", "error": str(e)}), 500
 
 
+# Most USRs one batch autosave may edit
+USR_BATCH_MAX = 100
+
+
+@annotator_bp.route("/usrs", methods=["PATCH"])
+@jwt_required()
+def patch_usrs():
+    """Autosave edits to several USRs in one request.
+
+    Takes ``{"usrs": [{"id": ..., "version": ..., "patch": {...}}]}``, where
+    ``patch`` is as for PATCH /usr/<id> and ``version`` is the USR's ETag
+    value, standing in for If-Match. The annotator's assignments for all the
+    USRs are checked with one query and everything is committed at once, with
+    each USR in a savepoint of its own so that one failing edit does not hold
+    back the rest. Returns a result per USR, in order, with the HTTP status
+    the same edit would have got from PATCH /usr/<id>.
+    """
+    annotator = get_current_annotator()
+    if not annotator:
+        return jsonify({"msg": "Annotator access required"}), 403
+
+    edits = (request.get_json(silent=True) or {}).get("usrs")
+    if not isinstance(edits, list) or not edits:
+        return jsonify({"msg": "usrs list required"}), 400
+    if len(edits) > USR_BATCH_MAX:
+        return jsonify({"msg": f"At most {USR_BATCH_MAX} USRs per request"}), 400
+    if not all(
+        isinstance(edit, dict) and type(edit.get("id")) is int for edit in edits
+    ):
+        return jsonify({"msg": "Each edit needs an integer id"}), 400
+
+    assigned = {
+        usr.id: (assignment, usr, segment)
+        for assignment, usr, segment in db.session.query(Assignment, USR, Segment)
+        .join(USR, Assignment.usr_id == USR.id)
+        .join(Segment, USR.segment_id == Segment.id)
+        .filter(
+            Assignment.annotator_id == annotator.id,
+            Assignment.usr_id.in_({edit["id"] for edit in edits}),
+        )
+    }
+
+    results = []
+    seen = set()
+    for edit in edits:
+        usr_id = edit["id"]
+        result = {"id": usr_id}
+        results.append(result)
+
+        if usr_id not in assigned:
+            result.update(status=403, msg="USR not assigned to you")
+            continue
+        if usr_id in seen:
+            result.update(status=400, msg="USR edited twice in one batch")
+            continue
+        seen.add(usr_id)
+        if type(edit.get("version")) is not int:
+            result.update(status=428, msg="version of the USR required")
+            continue
+        if not isinstance(edit.get("patch"), dict):
+            result.update(status=400, msg="patch object required")
+            continue
+
+        assignment, usr, segment = assigned[usr_id]
+        try:
+            with db.session.begin_nested():
+                version = bump_usr_version(usr_id, [edit["version"]])
+                if version is None:
+                    raise UsrPatchError(
+                        ["USR was changed by someone else, reload it"], 412
+                    )
+                changes = apply_usr_patch(usr, edit["patch"], assignment)
+
+                refresh_usr_render(usr, segment)
+                old_status = assignment.annotation_status
+                assignment.annotation_status = "In Progress"
+                adjust_status_progress(segment.id, old_status, "In Progress")
+            result.update(status=200, version=version, **changes)
+        except UsrPatchError as e:
+            result.update(status=e.status, errors=e.errors)
+        except Exception as e:
+            current_app.logger.error(f"Error updating USR {usr_id}: {str(e)}")
+            result.update(status=500, msg="Error updating USR", error=str(e))
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error saving USRs: {str(e)}")
+        return jsonify({"msg": "Error saving USRs", "error": str(e)}), 500
+
+    saved = sum(1 for result in results if result["status"] == 200)
+    return jsonify({"msg": f"{saved} of {len(results)} USRs saved", "results": results})
+
+
 @annotator_bp.route("/submit_usr/<int:usr_id>", methods=["POST"])
 @jwt_required()
 def submit_usr(usr_id):
@@ -668,7 +717,11 @@ def submit_usr(usr_id):
         return jsonify({"msg": "USR not assigned to you"}), 403
 
     try:
+        old_status = assignment.annotation_status
         assignment.annotation_status = "Submitted for Review"
+        adjust_status_progress(
+            assignment.segment_id, old_status, "Submitted for Review"
+        )
         db.session.commit()
         return jsonify({"msg": "USR submitted for review"})
     except Exception as e:
@@ -676,6 +729,45 @@ def submit_usr(usr_id):
         return jsonify({"msg": "Error submitting USR", "error": str(e)}), 500
 
 
+@annotator_bp.route("/submit_usrs", methods=["POST"])
+@jwt_required()
+def submit_usrs():
+    """Submit many USRs for review with one set-based UPDATE.
+
+    Takes ``{"ids": [...]}`` or a filter of ``chapter_id``, ``project_id``
+    and ``status``. Assignments that are already submitted or reviewed are
+    skipped; both the changed and the skipped USR ids are returned.
+    """
+    annotator = get_current_annotator()
+    if not annotator:
+        return jsonify({"msg": "Annotator access required"}), 403
+
+    try:
+        selection = transition_selection(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    try:
+        changed, skipped = transition_assignments(
+            Assignment.annotator_id == annotator.id,
+            "Submitted for Review",
+            SUBMIT_FROM_STATUSES,
+            **selection,
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error submitting USRs", "error": str(e)}), 500
+
+    return jsonify(
+        {
+            "msg": f"{len(changed)} USRs submitted for review",
+            "changed": changed,
+            "skipped": skipped,
+        }
+    )
+
+
 # Concept Routes
 
 
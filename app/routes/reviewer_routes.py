@@ -1,57 +1,140 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, User, Assignment, USR
+from app.models import db, User, Assignment, USR, Segment, Chapter, Project
+from app.queries import (
+    assignment_hierarchy_query,
+    usr_layer_loaders,
+    assignment_status_summary,
+)
+from app.progress import adjust_status_progress
+from app.transitions import (
+    REVIEW_FROM_STATUSES,
+    transition_assignments,
+    transition_selection,
+)
+from app.usr_format import usr_text, serialize_usr_layers
 
 reviewer_bp = Blueprint("reviewer", __name__)
 
+REVIEW_PAGE_LIMIT = 100
+REVIEW_PAGE_MAX_LIMIT = 1000
 
-@reviewer_bp.route("/assignments", methods=["GET"])
-@jwt_required()
-def get_reviewer_assignments():
+
+def get_current_reviewer():
     email = get_jwt_identity()
     user = User.query.filter_by(email=email).first()
-
     if not user or user.role != "reviewer":
+        return None
+    return user
+
+
+@reviewer_bp.route("/assignments", methods=["GET"])
+@jwt_required()
+def get_reviewer_assignments():
+    """List the reviewer's assignments, oldest first, a page at a time.
+
+    Pages are keyed on the assignment id: pass the X-Next-After-Id header of
+    one response as ``after_id`` to get the next page. The header is absent
+    on the last page.
+    """
+    reviewer = get_current_reviewer()
+    if not reviewer:
         return jsonify({"msg": "Reviewer access only"}), 403
 
-    assignments = Assignment.query.filter_by(reviewer_id=user.id).all()
+    after_id = request.args.get("after_id", 0, type=int)
+    limit = request.args.get("limit", REVIEW_PAGE_LIMIT, type=int)
+    if limit < 1 or limit > REVIEW_PAGE_MAX_LIMIT:
+        return (
+            jsonify({"msg": f"limit must be between 1 and {REVIEW_PAGE_MAX_LIMIT}"}),
+            400,
+        )
+    include_layers = request.args.get("include_layers", "false").lower() == "true"
+
+    query = assignment_hierarchy_query(
+        Assignment,
+        USR,
+        Segment,
+        Chapter.id.label("chapter_id"),
+        Chapter.title.label("chapter_title"),
+        Project.id.label("project_id"),
+        Project.title.label("project_title"),
+    ).filter(Assignment.reviewer_id == reviewer.id, Assignment.id > after_id)
+
+    status = request.args.get("status")
+    if status:
+        query = query.filter(Assignment.annotation_status == status)
+
+    if include_layers:
+        query = query.options(*usr_layer_loaders())
+
+    # One extra row tells us whether there is a next page
+    rows = query.order_by(Assignment.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
     result = []
+    for row in rows:
+        a, usr, segment = row.Assignment, row.USR, row.Segment
+        item = {
+            "assignment_id": a.id,
+            "usr_id": usr.id,
+            "segment_id": segment.id,
+            "segment_label": segment.segment_id,
+            "segment_text": segment.text,
+            "chapter_id": row.chapter_id,
+            "chapter_title": row.chapter_title,
+            "project_id": row.project_id,
+            "project_title": row.project_title,
+            "status": usr.status,
+            "annotation_status": a.annotation_status,
+            "raw_text": usr_text(usr, segment),
+        }
+        if include_layers:
+            item.update(serialize_usr_layers(usr))
+        result.append(item)
 
-    for a in assignments:
-        usr = USR.query.get(a.usr_id)
-        result.append(
-            {
-                "assignment_id": a.id,
-                "usr_id": usr.id,
-                "segment_id": usr.segment_id,
-                "status": usr.status,
-                "data": usr.data,
-                "annotation_status": a.annotation_status,
-            }
-        )
+    response = jsonify(result)
+    if has_more:
+        response.headers["X-Next-After-Id"] = str(rows[-1].Assignment.id)
+    return response
 
-    return jsonify(result)
+
+@reviewer_bp.route("/summary", methods=["GET"])
+@jwt_required()
+def reviewer_summary():
+    """Assignment counts by project, chapter and annotation status."""
+    reviewer = get_current_reviewer()
+    if not reviewer:
+        return jsonify({"msg": "Reviewer access only"}), 403
+
+    return jsonify(assignment_status_summary(Assignment.reviewer_id == reviewer.id))
 
 
 @reviewer_bp.route("/usr/<int:usr_id>", methods=["GET"])
 @jwt_required()
 def get_usr_for_review(usr_id):
-    email = get_jwt_identity()
-    user = User.query.filter_by(email=email).first()
+    reviewer = get_current_reviewer()
+    if not reviewer:
+        return jsonify({"msg": "Reviewer access only"}), 403
 
-    assignment = Assignment.query.filter_by(usr_id=usr_id, reviewer_id=user.id).first()
+    assignment = Assignment.query.filter_by(
+        usr_id=usr_id, reviewer_id=reviewer.id
+    ).first()
     if not assignment:
         return jsonify({"msg": "Not assigned to this USR"}), 403
 
-    usr = USR.query.get(usr_id)
-    return jsonify(
-        {
-            "usr_id": usr.id,
-            "segment_id": usr.segment_id,
-            "status": usr.status,
-            "data": usr.data,
-        }
-    )
+    usr = USR.query.options(*usr_layer_loaders()).filter_by(id=usr_id).first()
+    if not usr:
+        return jsonify({"msg": "USR not found"}), 404
+
+    usr_data = {
+        "usr_id": usr.id,
+        "segment_id": usr.segment_id,
+        "status": usr.status,
+        "raw_text": usr_text(usr, usr.segment),
+    }
+    usr_data.update(serialize_usr_layers(usr))
+    return jsonify(usr_data)
 
 
 @reviewer_bp.route("/usr/<int:usr_id>", methods=["PUT"])
@@ -72,7 +155,55 @@ def review_usr(usr_id):
 
     usr = USR.query.get(usr_id)
     usr.status = status
+    old_status = assignment.annotation_status
     assignment.annotation_status = status
+    adjust_status_progress(assignment.segment_id, old_status, status)
 
     db.session.commit()
     return jsonify({"msg": f"USR marked as {status}"})
+
+
+@reviewer_bp.route("/usrs", methods=["PUT"])
+@jwt_required()
+def review_usrs():
+    """Mark many USRs Reviewed or Needs Revision with one set-based UPDATE.
+
+    Takes ``status`` plus ``{"ids": [...]}`` or a filter of ``chapter_id``,
+    ``project_id`` and ``current_status``, e.g. every submitted USR of a
+    chapter. USRs not yet submitted are skipped; both the changed and the
+    skipped USR ids are returned.
+    """
+    reviewer = get_current_reviewer()
+    if not reviewer:
+        return jsonify({"msg": "Reviewer access only"}), 403
+
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    if status not in ["Reviewed", "Needs Revision"]:
+        return jsonify({"msg": "Invalid review status"}), 400
+
+    try:
+        selection = transition_selection({**data, "status": data.get("current_status")})
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    try:
+        changed, skipped = transition_assignments(
+            Assignment.reviewer_id == reviewer.id,
+            status,
+            REVIEW_FROM_STATUSES,
+            set_usr_status=True,
+            **selection,
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error reviewing USRs", "error": str(e)}), 500
+
+    return jsonify(
+        {
+            "msg": f"{len(changed)} USRs marked as {status}",
+            "changed": changed,
+            "skipped": skipped,
+        }
+    )
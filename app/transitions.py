@@ -0,0 +1,150 @@
+"""Status transitions of many assignments at once.
+
+Bulk submit and bulk review pick their assignments either by USR id or by a
+filter (project, chapter, current status). The matching assignments are
+read with one query, those whose status allows the transition are moved with
+one set-based UPDATE, and the progress counters get one adjustment per
+chapter touched. The rest are reported back as skipped, with the reason.
+"""
+
+from collections import Counter, defaultdict
+
+from sqlalchemy import update
+
+from app.models import db, Assignment, Chapter, USR
+from app.progress import adjust_progress, status_deltas
+from app.queries import assignment_hierarchy_query
+
+# Most USR ids one bulk transition may name
+TRANSITION_MAX_IDS = 10000
+
+SUBMIT_FROM_STATUSES = ["Assigned", "In Progress", "Needs Revision"]
+REVIEW_FROM_STATUSES = [
+    "Submitted",
+    "Submitted for Review",
+    "Reviewed",
+    "Needs Revision",
+]
+
+
+def transition_selection(data):
+    """Read the assignments a bulk transition applies to from a request body.
+
+    Takes ``{"ids": [usr ids]}`` or any of ``chapter_id``, ``project_id``
+    and ``status``. Returns keyword arguments for ``transition_assignments``;
+    raises ValueError if the body names no assignments.
+    """
+    ids = data.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not all(type(i) is int for i in ids):
+            raise ValueError("ids must be a list of integer USR ids")
+        if len(ids) > TRANSITION_MAX_IDS:
+            raise ValueError(f"At most {TRANSITION_MAX_IDS} ids per request")
+        ids = list(dict.fromkeys(ids))
+
+    selection = {"usr_ids": ids}
+    for name in ("chapter_id", "project_id"):
+        value = data.get(name)
+        if value is not None and type(value) is not int:
+            raise ValueError(f"{name} must be an integer")
+        selection[name] = value
+    status = data.get("status")
+    if status is not None and not isinstance(status, str):
+        raise ValueError("status must be a string")
+    selection["status"] = status
+
+    if ids is None and selection["chapter_id"] is selection["project_id"] is None:
+        raise ValueError("ids, chapter_id or project_id required")
+    return selection
+
+
+def transition_assignments(
+    owner,
+    new_status,
+    from_statuses,
+    usr_ids=None,
+    chapter_id=None,
+    project_id=None,
+    status=None,
+    set_usr_status=False,
+):
+    """Move the assignments matching ``owner`` and a selection to ``new_status``.
+
+    Only assignments currently in one of ``from_statuses`` are moved; with
+    ``set_usr_status`` their USRs' status is set as well. Nothing is
+    committed. Returns ``(changed, skipped)``: the USR ids moved and a
+    ``{"usr_id", "reason"}`` for every other selected USR.
+    """
+    query = assignment_hierarchy_query(
+        Assignment.id,
+        Assignment.usr_id,
+        Assignment.annotation_status,
+        Chapter.id.label("chapter_id"),
+        Chapter.project_id,
+    ).filter(owner)
+    if usr_ids is not None:
+        query = query.filter(Assignment.usr_id.in_(usr_ids))
+    if chapter_id is not None:
+        query = query.filter(Chapter.id == chapter_id)
+    if project_id is not None:
+        query = query.filter(Chapter.project_id == project_id)
+    if status:
+        query = query.filter(Assignment.annotation_status == status)
+    # Lock the rows so that the statuses read here are the ones replaced
+    rows = query.order_by(Assignment.id).with_for_update(of=Assignment).all()
+
+    movable, skipped = [], []
+    for row in rows:
+        if row.annotation_status == new_status:
+            skipped.append({"usr_id": row.usr_id, "reason": f"already {new_status}"})
+        elif row.annotation_status not in from_statuses:
+            skipped.append(
+                {"usr_id": row.usr_id, "reason": f"status is {row.annotation_status}"}
+            )
+        else:
+            movable.append(row)
+    if usr_ids is not None:
+        found = {row.usr_id for row in rows}
+        skipped.extend(
+            {"usr_id": usr_id, "reason": "not assigned to you"}
+            for usr_id in usr_ids
+            if usr_id not in found
+        )
+    if not movable:
+        return [], skipped
+
+    moved = set(
+        db.session.execute(
+            update(Assignment)
+            .where(
+                Assignment.id.in_([row.id for row in movable]),
+                Assignment.annotation_status.in_(from_statuses),
+            )
+            .values(annotation_status=new_status)
+            .returning(Assignment.id)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+
+    deltas = defaultdict(Counter)
+    changed = []
+    for row in movable:
+        if row.id not in moved:
+            skipped.append({"usr_id": row.usr_id, "reason": "status changed"})
+            continue
+        changed.append(row.usr_id)
+        chapter = (row.chapter_id, row.project_id)
+        deltas[chapter].update(status_deltas(row.annotation_status, new_status))
+    changed = list(dict.fromkeys(changed))
+
+    if set_usr_status and changed:
+        db.session.execute(
+            update(USR)
+            .where(USR.id.in_(changed))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+    for (chapter_id, project_id), counts in deltas.items():
+        adjust_progress(chapter_id, project_id, **counts)
+
+    return changed, skipped
@@ -0,0 +1,386 @@
+"""Parsing and rendering of USRs in the 9-column text format.
+
+Each concept row is written as:
+
+    concept  index  semantic_category  morpho_semantic  dependency
+    discourse_coref  speakers_view  scope  construction
+
+with "-" standing in for empty columns. The block is wrapped in a
+``<segment_id=...>`` (or ``<sent_id=...>``) header, the segment text as a
+``#`` comment line and an optional ``%`` sentence type marker.
+
+The concept rows are also materialized on ``USR.rendered_text`` together with
+a ``content_hash`` of the full block, so reads that only need the text do not
+have to touch the layer tables.
+"""
+
+import hashlib
+from collections import namedtuple
+
+from sqlalchemy.orm import object_session
+
+USR_LAYER_ATTRS = [
+    "lexical_info",
+    "dependency_info",
+    "discourse_coref_info",
+    "construction_info",
+    "sentence_type_info",
+]
+
+
+def _group_relations(rows, head_attr, label_attr):
+    """Group ``head:label`` pairs by concept index in a single pass."""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.index, []).append(
+            f"{getattr(row, head_attr)}:{getattr(row, label_attr)}"
+        )
+    return {index: " ".join(pairs) for index, pairs in grouped.items()}
+
+
+# One ``<segment_id=...>`` block of a USR file; ``error`` is set if it is cut off
+UsrBlock = namedtuple("UsrBlock", "number line label lines error")
+
+
+def iter_usr_blocks(stream):
+    """Yield the ``<segment_id=...>`` blocks of a USR file one at a time.
+
+    ``stream`` is any iterable of text lines, e.g. an open file, so only the
+    block being read is held in memory however large the file is. Lines
+    outside blocks are ignored.
+    """
+    number = 0
+    start = label = None
+    lines = []
+    for line_no, line in enumerate(stream, start=1):
+        stripped = line.strip()
+        if stripped.startswith("<segment_id="):
+            if start is not None:
+                number += 1
+                yield UsrBlock(number, start, label, lines, "unclosed block")
+            start, label, lines = line_no, stripped[12:-1].strip(), [stripped]
+        elif start is not None:
+            lines.append(stripped)
+            if stripped.startswith("</segment_id>"):
+                number += 1
+                yield UsrBlock(number, start, label, lines, None)
+                start = label = None
+
+    if start is not None:
+        number += 1
+        yield UsrBlock(number, start, label, lines, "unclosed block")
+
+
+def parse_custom_usr_format(raw_data):
+    """Parse the custom USR format with 9 columns, ensuring all concepts appear in all tables."""
+    return parse_usr_lines(raw_data.split("\n"))
+
+
+def parse_usr_lines(lines):
+    """Parse the lines of one USR block, see ``parse_custom_usr_format``."""
+    parsed_data = {
+        "sentence_type": "declarative",  # default sentence type
+        "lexical_info": [],
+        "dependency_info": [],
+        "discourse_coref_info": [],
+        "construction_info": [],
+        "sentence_type_info": {
+            "sentence_type": "declarative",  # will be set by % marker
+            "scope": None,  # scope is per-concept, not global
+        },
+    }
+
+    segment_id = None
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Handle metadata
+        if line.startswith("<segment_id="):
+            segment_id = line[12:-1].strip()
+            continue
+        elif line.startswith("</segment_id>") or line.startswith("#"):
+            continue
+        elif line.startswith("%"):
+            # This sets the overall sentence type
+            marker = line[1:].lower().strip()
+            if marker in ["affirmative", "negative", "interrogative"]:
+                parsed_data["sentence_type"] = marker
+                parsed_data["sentence_type_info"]["sentence_type"] = marker
+            continue
+
+        # Process token lines (9 columns)
+        columns = line.split("\t")
+        if len(columns) < 9:
+            continue
+
+        # Get the full concept name from the first column (don't split it)
+        concept_full = columns[0].strip()
+
+        # Handle index (required field)
+        try:
+            index = (
+                int(columns[1].strip())
+                if columns[1].strip() and columns[1].strip() != "-"
+                else 0
+            )
+        except ValueError:
+            index = 0
+
+        # --- LEXICAL INFO ---
+        lexical_item = {
+            "concept": concept_full,
+            "index": index,
+            "semantic_category": (
+                columns[2].strip() if columns[2].strip() != "-" else None
+            ),
+            "morpho_semantic": (
+                columns[3].strip() if columns[3].strip() != "-" else None
+            ),
+            "speakers_view": columns[6].strip() if columns[6].strip() != "-" else None,
+            "scope": (
+                columns[7].strip() if columns[7].strip() != "-" else None
+            ),  # Scope from column 7
+        }
+        parsed_data["lexical_info"].append(lexical_item)
+
+        # --- DEPENDENCY INFO ---
+        dep_relations = []
+        if columns[4].strip() != "-":
+            for dep_rel in columns[4].strip().split():
+                if ":" in dep_rel:
+                    head, relation = dep_rel.split(":", 1)
+                    try:
+                        head_index = int(head) if head and head != "-" else None
+                        dep_relations.append((head_index, relation))
+                    except ValueError:
+                        continue
+
+        # If no relations, add a default entry
+        if not dep_relations:
+            dep_relations.append((None, "-"))
+
+        for head_index, relation in dep_relations:
+            parsed_data["dependency_info"].append(
+                {
+                    "concept": concept_full,
+                    "index": index,
+                    "head_index": head_index,
+                    "relation": relation,
+                }
+            )
+
+        # --- DISCOURSE/COREF INFO ---
+        coref_relations = []
+        if columns[5].strip() != "-":
+            for coref_rel in columns[5].strip().split():
+                if ":" in coref_rel:
+                    head, relation = coref_rel.split(":", 1)
+                    try:
+                        head_index = int(head) if head and head != "-" else None
+                        coref_relations.append((head_index, relation))
+                    except ValueError:
+                        continue
+
+        # If no relations, add a default entry
+        if not coref_relations:
+            coref_relations.append((None, "-"))
+
+        for head_index, relation in coref_relations:
+            parsed_data["discourse_coref_info"].append(
+                {
+                    "concept": concept_full,
+                    "index": index,
+                    "head_index": head_index,
+                    "relation": relation,
+                }
+            )
+
+        # --- CONSTRUCTION INFO ---
+        const_relations = []
+        if columns[8].strip() != "-":
+            for const_rel in columns[8].strip().split():
+                if ":" in const_rel:
+                    cxn_index, component = const_rel.split(":", 1)
+                    try:
+                        cxn_index = (
+                            int(cxn_index) if cxn_index and cxn_index != "-" else None
+                        )
+                        const_relations.append((cxn_index, component))
+                    except ValueError:
+                        continue
+
+        # If no relations, add a default entry
+        if not const_relations:
+            const_relations.append((None, "-"))
+
+        for cxn_index, component in const_relations:
+            parsed_data["construction_info"].append(
+                {
+                    "concept": concept_full,
+                    "index": index,
+                    "cxn_index": cxn_index,
+                    "component_type": component,
+                }
+            )
+
+    return parsed_data
+
+
+def render_usr_rows(
+    lexical_info,
+    dependency_info,
+    discourse_coref_info,
+    construction_info,
+    sentence_type_info,
+):
+    """Render the concept rows and sentence type marker of a USR.
+
+    Layers are passed as sequences of rows with the same attributes as the
+    model classes, so the renderer works both on ORM objects and on plain
+    row objects built during imports. Every layer is walked once, making
+    rendering linear in the number of rows.
+    """
+    dependencies = _group_relations(dependency_info, "head_index", "relation")
+    discourse = _group_relations(discourse_coref_info, "head_index", "relation")
+    constructions = _group_relations(construction_info, "cxn_index", "component_type")
+
+    scope = sentence_type_info[0].scope if sentence_type_info else None
+
+    lines = []
+    for li in sorted(lexical_info, key=lambda x: x.index):
+        line_parts = [
+            li.concept or "-",
+            str(li.index) if li.index is not None else "-",
+            li.semantic_category or "-",
+            li.morpho_semantic or "-",
+            dependencies.get(li.index) or "-",
+            discourse.get(li.index) or "-",
+            li.speakers_view or "-",
+            scope or "-",
+            constructions.get(li.index) or "-",
+        ]
+        lines.append("\t".join(line_parts))
+
+    # Add sentence type marker if present
+    if scope and scope != "neutral":
+        lines.append(f"%{scope}")
+
+    return lines
+
+
+def wrap_usr_rows(rows_text, segment, tag="segment_id", label=None):
+    """Wrap rendered concept rows in the segment header, text and footer."""
+    if label is None:
+        label = segment.segment_id
+
+    usr_lines = [f"<{tag}={label}>", f"#{segment.text}"]
+    if rows_text:
+        usr_lines.append(rows_text)
+    usr_lines.append(f"</{tag}>")
+
+    return "\n".join(usr_lines)
+
+
+def render_usr_text(usr, segment, tag="segment_id", label=None):
+    """Render a USR and its segment as a complete 9-column text block."""
+    rows = render_usr_rows(
+        usr.lexical_info,
+        usr.dependency_info,
+        usr.discourse_coref_info,
+        usr.construction_info,
+        usr.sentence_type_info,
+    )
+    return wrap_usr_rows("\n".join(rows), segment, tag=tag, label=label)
+
+
+def usr_text(usr, segment, tag="segment_id", label=None):
+    """Return the USR text block, using the materialized rows when present.
+
+    A USR without materialized rows falls back to rendering from the layer
+    tables, loading them per USR; the 2b7e4f9c6a31 migration backfills the
+    rows so that this should not happen.
+    """
+    if usr.rendered_text is None:
+        return render_usr_text(usr, segment, tag=tag, label=label)
+    return wrap_usr_rows(usr.rendered_text, segment, tag=tag, label=label)
+
+
+def hash_usr_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def refresh_usr_render(usr, segment=None):
+    """Re-render the materialized rows and content hash of a USR.
+
+    Pending layer rows are flushed and the layer collections reloaded first,
+    so rows added with ``db.session.add`` rather than through the
+    relationships are picked up. Call this before committing any write to a
+    USR's layers.
+    """
+    session = object_session(usr)
+    session.flush()
+    session.expire(usr, USR_LAYER_ATTRS)
+
+    usr.rendered_text = "\n".join(
+        render_usr_rows(
+            usr.lexical_info,
+            usr.dependency_info,
+            usr.discourse_coref_info,
+            usr.construction_info,
+            usr.sentence_type_info,
+        )
+    )
+    usr.content_hash = hash_usr_text(
+        wrap_usr_rows(usr.rendered_text, segment or usr.segment)
+    )
+
+
+def serialize_usr_layers(usr):
+    """Serialize the five annotation layers of a USR as JSON-ready dicts."""
+    scope = usr.sentence_type_info[0].scope if usr.sentence_type_info else None
+    return {
+        "lexical_info": [
+            {
+                "concept": li.concept,
+                "index": li.index,
+                "semantic_category": li.semantic_category,
+                "morpho_semantic": li.morpho_semantic,
+                "speakers_view": li.speakers_view,
+            }
+            for li in usr.lexical_info
+        ],
+        "dependency_info": [
+            {
+                "concept": di.concept,
+                "index": di.index,
+                "head_index": di.head_index,
+                "relation": di.relation,
+            }
+            for di in usr.dependency_info
+        ],
+        "discourse_coref_info": [
+            {
+                "concept": dci.concept,
+                "index": dci.index,
+                "head_index": dci.head_index,
+                "relation": dci.relation,
+            }
+            for dci in usr.discourse_coref_info
+        ],
+        "construction_info": [
+            {
+                "concept": ci.concept,
+                "index": ci.index,
+                "cxn_index": ci.cxn_index,
+                "component_type": ci.component_type,
+            }
+            for ci in usr.construction_info
+        ],
+        "sentence_type_info": {
+            "sentence_type": usr.sentence_type,
+            "scope": scope if usr.sentence_type_info else "neutral",
+        },
+    }
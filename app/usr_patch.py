@@ -0,0 +1,204 @@
+"""Row-level edits of USR layers.
+
+A patch names the layers it changes, each with a list of operations::
+
+    {
+        "dependency_info": [
+            {"op": "set", "id": 12, "field": "relation", "value": "k2"},
+            {"op": "delete", "id": 13}
+        ],
+        "lexical_info": [
+            {"op": "add", "row": {"concept": "rAma_1", "index": 5}}
+        ],
+        "sentence_type": "interrogative"
+    }
+
+The whole patch is validated first, then applied with one UPDATE per edited
+row, one DELETE and one INSERT per layer, so the work done is proportional
+to the size of the change rather than the size of the USR.
+
+Every edit also bumps ``USR.version``, which clients echo back in If-Match
+so that concurrent edits are detected instead of overwriting each other.
+"""
+
+from sqlalchemy import Integer, delete, update
+
+from app.bulk_import import insert_returning_ids
+from app.models import db, USR
+from app.models import (
+    LexicalInfo,
+    DependencyInfo,
+    DiscourseCorefInfo,
+    ConstructionInfo,
+    SentenceTypeInfo,
+)
+
+# Layer name -> (model, Assignment flag needed to edit it)
+USR_PATCH_LAYERS = {
+    "lexical_info": (LexicalInfo, "assign_lexical"),
+    "dependency_info": (DependencyInfo, "assign_dependency"),
+    "discourse_coref_info": (DiscourseCorefInfo, "assign_discourse"),
+    "construction_info": (ConstructionInfo, "assign_construction"),
+    "sentence_type_info": (SentenceTypeInfo, None),
+}
+
+
+class UsrPatchError(Exception):
+    """The patch cannot be applied; ``status`` is the HTTP status to return."""
+
+    def __init__(self, errors, status=400):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+        self.status = status
+
+
+def _editable_columns(model):
+    return {
+        column.name: column
+        for column in model.__table__.columns
+        if column.name not in ("id", "usr_id")
+    }
+
+
+def _coerce(column, value):
+    if value is None:
+        if not column.nullable:
+            raise ValueError(f"{column.name} is required")
+        return None
+    if isinstance(column.type, Integer):
+        return int(value)
+    return str(value)
+
+
+def _row_id(op):
+    if op.get("id") is None:
+        raise ValueError("id is required")
+    return int(op["id"])
+
+
+def _plan(patch, assignment):
+    """Validate a patch into ``{layer: (model, sets, adds, deletes)}``."""
+    errors = []
+    plan = {}
+    for layer, ops in patch.items():
+        if layer == "sentence_type":
+            if not ops or not isinstance(ops, str):
+                errors.append("sentence_type must be a non-empty string")
+            continue
+        if layer not in USR_PATCH_LAYERS:
+            errors.append(f"unknown layer {layer}")
+            continue
+        model, permission = USR_PATCH_LAYERS[layer]
+        if permission and not getattr(assignment, permission):
+            errors.append(f"{layer} is not assigned to you")
+            continue
+        if not isinstance(ops, list):
+            errors.append(f"{layer}: expected a list of operations")
+            continue
+
+        columns = _editable_columns(model)
+        sets, adds, deletes = {}, [], set()
+        for i, op in enumerate(ops, start=1):
+            try:
+                if not isinstance(op, dict):
+                    raise ValueError("expected an object")
+                kind = op.get("op")
+                if kind == "set":
+                    field = op.get("field")
+                    if field not in columns:
+                        raise ValueError(f"unknown field {field}")
+                    values = sets.setdefault(_row_id(op), {})
+                    values[field] = _coerce(columns[field], op.get("value"))
+                elif kind == "add":
+                    row = op.get("row")
+                    if not isinstance(row, dict):
+                        raise ValueError("row must be an object")
+                    unknown = sorted(set(row) - set(columns))
+                    if unknown:
+                        raise ValueError(f"unknown fields {', '.join(unknown)}")
+                    adds.append(
+                        {name: _coerce(c, row.get(name)) for name, c in columns.items()}
+                    )
+                elif kind == "delete":
+                    deletes.add(_row_id(op))
+                else:
+                    raise ValueError("op must be set, add or delete")
+            except (TypeError, ValueError) as e:
+                errors.append(f"{layer} operation {i}: {e}")
+
+        plan[layer] = (model, sets, adds, deletes)
+
+    if errors:
+        raise UsrPatchError(errors)
+    return plan
+
+
+def apply_usr_patch(usr, patch, assignment):
+    """Apply a patch to ``usr`` without committing; returns what was changed.
+
+    Layers the assignment does not cover are rejected. Raises UsrPatchError
+    with status 400 for an invalid patch and 409 if a row it edits or
+    deletes no longer belongs to the USR; the caller rolls back.
+    """
+    plan = _plan(patch, assignment)
+    report = {"updated": 0, "deleted": 0, "added": {}}
+
+    if "sentence_type" in patch:
+        usr.sentence_type = patch["sentence_type"]
+        db.session.execute(
+            update(SentenceTypeInfo)
+            .where(SentenceTypeInfo.usr_id == usr.id)
+            .values(sentence_type=patch["sentence_type"])
+        )
+
+    for layer, (model, sets, adds, deletes) in plan.items():
+        for row_id, values in sets.items():
+            result = db.session.execute(
+                update(model)
+                .where(model.id == row_id, model.usr_id == usr.id)
+                .values(**values)
+            )
+            if result.rowcount != 1:
+                raise UsrPatchError([f"{layer} row {row_id} not found"], 409)
+            report["updated"] += 1
+
+        if deletes:
+            result = db.session.execute(
+                delete(model).where(model.id.in_(deletes), model.usr_id == usr.id)
+            )
+            if result.rowcount != len(deletes):
+                raise UsrPatchError([f"{layer}: some deleted rows not found"], 409)
+            report["deleted"] += len(deletes)
+
+        if adds:
+            report["added"][layer] = insert_returning_ids(
+                model, [{"usr_id": usr.id, **row} for row in adds]
+            )
+
+    return report
+
+
+def usr_versions(if_match):
+    """USR versions named by a parsed If-Match header; None for ``*``."""
+    if if_match.star_tag:
+        return None
+    return [int(tag) for tag in if_match.as_set() if tag.isdigit()]
+
+
+def bump_usr_version(usr_id, expected=None):
+    """Increment a USR's version if it is still one of ``expected``.
+
+    ``expected`` None bumps it unconditionally. Returns the new version, or
+    None if the USR has changed since (or is gone). The conditional UPDATE
+    locks the row until commit, so a concurrent writer waits and then finds
+    its version stale rather than overwriting this write.
+    """
+    stmt = (
+        update(USR)
+        .where(USR.id == usr_id)
+        .values(version=USR.version + 1)
+        .returning(USR.version)
+    )
+    if expected is not None:
+        stmt = stmt.where(USR.version.in_(expected))
+    return db.session.execute(stmt).scalar()
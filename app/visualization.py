@@ -0,0 +1,592 @@
+"""Graphviz visualizations of USRs and a content-addressed cache for them.
+
+Rendered images are keyed on a hash of the USR text plus the output format,
+so an unchanged USR is served from the cache without starting ``dot``. The
+cache keeps a size-bounded LRU in memory and, when VISUALIZATION_CACHE_DIR is
+configured, a shared on-disk store behind it.
+
+Graphviz itself runs through a bounded render pool: at most
+VISUALIZATION_RENDER_WORKERS ``dot`` processes at a time, each killed after
+VISUALIZATION_RENDER_TIMEOUT seconds, with up to VISUALIZATION_RENDER_QUEUE
+renders waiting. Requests beyond that are turned away with a 503.
+"""
+
+import hashlib
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from flask import jsonify, make_response, request
+from graphviz import Digraph
+
+CONSTRUCTION_COLORS = ["#FFF2CC", "#D5E8D4", "#DAE8FC", "#E1D5E7"]
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "dot": "text/vnd.graphviz; charset=utf-8",
+    "json": "application/json",
+}
+
+
+def build_graph_data(usr_data):
+    """Extract nodes, labelled edges and construction clusters from a USR.
+
+    This is the layout-free structure behind every visualization: the
+    Graphviz renderings are drawn from it, and it is served as JSON for
+    clients that lay the graph out themselves.
+    """
+    nodes = {}
+    hindi_words = {}
+    construction_nodes = set()
+
+    for line in usr_data.split("\n"):
+        line = line.strip()
+        if not line or line.startswith(("#", "<", "%", "//")):
+            if line.startswith("#"):  # Hindi words line
+                # Split Hindi sentence by whitespace instead of tabs
+                hindi_words = {
+                    i + 1: word for i, word in enumerate(line[1:].strip().split())
+                }
+            continue
+
+        parts = line.split("\t")
+        if len(parts) < 9:
+            continue
+
+        node_id = parts[0]
+        try:
+            node_index = int(parts[1]) if parts[1] and parts[1] != "-" else 0
+        except ValueError:
+            continue
+
+        is_construction = node_id.startswith("[")
+        if is_construction:
+            construction_nodes.add(node_index)
+
+        nodes[node_index] = {
+            "id": f"{node_id}_{node_index}",
+            "original_id": node_id,
+            "deps": [],
+            "word": hindi_words.get(node_index, node_id),
+            "is_construction": is_construction,
+        }
+
+        # Dependency info (column 5)
+        if parts[4] != "-":
+            for dep_rel in parts[4].split():
+                if ":" in dep_rel:
+                    head, rel = dep_rel.split(":", 1)
+                    if head.isdigit():
+                        head_node = int(head) if head != "0" else "ROOT"
+                        nodes[node_index]["deps"].append((head_node, rel))
+
+        # Construction info (column 9)
+        if parts[8] != "-":
+            for const_rel in parts[8].split():
+                if ":" in const_rel:
+                    head, rel = const_rel.split(":", 1)
+                    if head.isdigit():
+                        nodes[node_index]["deps"].append((int(head), rel))
+
+    # Construction concept clusters
+    clusters = []
+    for color_idx, constr_index in enumerate(sorted(construction_nodes)):
+        related_nodes = {constr_index}
+        for idx, node in nodes.items():
+            for head_idx, _ in node["deps"]:
+                if head_idx == constr_index:
+                    related_nodes.add(idx)
+
+        clusters.append(
+            {
+                "id": f"cluster_{constr_index}",
+                "index": constr_index,
+                "label": nodes[constr_index]["original_id"],
+                "color": CONSTRUCTION_COLORS[color_idx % len(CONSTRUCTION_COLORS)],
+                "nodes": [nodes[idx]["id"] for idx in sorted(related_nodes)],
+            }
+        )
+
+    # Edges run from the head to the dependent; root attachments are dropped
+    edges = []
+    for idx, node in nodes.items():
+        for head_idx, rel in node["deps"]:
+            if head_idx == "ROOT":
+                continue
+            if head_idx in nodes:
+                edges.append(
+                    {
+                        "source": nodes[head_idx]["id"],
+                        "target": node["id"],
+                        "label": rel,
+                    }
+                )
+
+    return {
+        "nodes": [
+            {
+                "id": node["id"],
+                "index": idx,
+                "concept": node["original_id"],
+                "word": node["word"],
+                "is_construction": node["is_construction"],
+            }
+            for idx, node in nodes.items()
+        ],
+        "edges": edges,
+        "clusters": clusters,
+    }
+
+
+def build_usr_graph(usr_data):
+    """Build the Graphviz dependency graph for a 9-column USR text block."""
+    graph = build_graph_data(usr_data)
+
+    dot = Digraph(comment="USR Dependency Graph")
+    dot.attr(rankdir="TB")  # Top to Bottom layout
+    dot.attr("node", shape="box", style="rounded")
+
+    nodes = {node["id"]: node for node in graph["nodes"]}
+    clustered_nodes = set()
+
+    for cluster in graph["clusters"]:
+        with dot.subgraph(name=cluster["id"]) as c:
+            c.attr(
+                style="filled,rounded,dotted",
+                color="gray50",
+                fillcolor=cluster["color"],
+                label=cluster["label"],
+                fontcolor="black",
+                penwidth="2",
+            )
+
+            for node_id in cluster["nodes"]:
+                node = nodes[node_id]
+                clustered_nodes.add(node_id)
+                c.node(node_id, label=f"{node['concept']}\n{node['word']}")
+
+    # Non-clustered nodes (normal lexical concepts)
+    for node in graph["nodes"]:
+        if node["id"] not in clustered_nodes and not node["is_construction"]:
+            dot.node(node["id"], label=f"{node['concept']}\n{node['word']}")
+
+    for edge in graph["edges"]:
+        dot.edge(edge["source"], edge["target"], label=edge["label"])
+
+    return dot
+
+
+class RenderPoolSaturated(Exception):
+    """Raised when the render queue is full."""
+
+    def __init__(self, retry_after):
+        super().__init__("Visualization render queue is full")
+        self.retry_after = retry_after
+
+
+class RenderTimeout(Exception):
+    """Raised when a single Graphviz render runs past the pool timeout."""
+
+
+class RenderPool:
+    """Bounded pool of Graphviz renders with timeouts and back-pressure.
+
+    Each render is a ``dot`` subprocess fed over stdin/stdout and supervised
+    by one of ``workers`` threads, so a render that overruns ``timeout`` is
+    killed rather than left holding a slot. At most ``workers + queue_size``
+    renders are admitted at once. Batch renders, such as ZIP exports, share
+    a budget of ``batch_limit`` in-flight renders between them, so the other
+    workers are left for interactive requests.
+    """
+
+    def __init__(self, workers=4, queue_size=16, timeout=10.0):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor = None
+        self._slots = None
+        self._batch_slots = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "rejected": 0,
+            "queued": 0,
+            "running": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "render_seconds_total": 0.0,
+            "render_seconds_max": 0.0,
+        }
+
+    def init_app(self, app):
+        self.workers = app.config.get("VISUALIZATION_RENDER_WORKERS", self.workers)
+        self.queue_size = app.config.get("VISUALIZATION_RENDER_QUEUE", self.queue_size)
+        self.timeout = app.config.get("VISUALIZATION_RENDER_TIMEOUT", self.timeout)
+        app.extensions["visualization_render_pool"] = self
+
+    def _ensure_started(self):
+        # Started lazily so forked server workers each get their own threads
+        with self._lock:
+            if self._executor is None:
+                self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+                self._batch_slots = threading.BoundedSemaphore(self.batch_limit)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="usr-render"
+                )
+
+    @property
+    def batch_limit(self):
+        """Renders that batch work may have in flight, across all batches."""
+        return max(1, self.workers // 2)
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up (at least 1)."""
+        with self._lock:
+            completed = self._metrics["completed"]
+            average = (
+                self._metrics["render_seconds_total"] / completed if completed else 1.0
+            )
+            backlog = self._metrics["queued"] + self._metrics["running"]
+        return max(1, math.ceil(average * backlog / max(self.workers, 1)))
+
+    def submit(self, source, fmt, block=False, batch=False):
+        """Queue a render and return its future.
+
+        Raises RenderPoolSaturated when the queue is full, unless ``block``
+        is set, in which case the caller waits for a free slot instead.
+        ``batch`` renders first wait for one of the ``batch_limit`` slots.
+        """
+        self._ensure_started()
+        if batch:
+            self._batch_slots.acquire()
+        if not self._slots.acquire(blocking=block):
+            if batch:
+                self._batch_slots.release()
+            with self._lock:
+                self._metrics["rejected"] += 1
+            raise RenderPoolSaturated(self.retry_after())
+
+        with self._lock:
+            self._metrics["submitted"] += 1
+            self._metrics["queued"] += 1
+        try:
+            return self._executor.submit(
+                self._run, source, fmt, time.monotonic(), batch
+            )
+        except Exception:
+            with self._lock:
+                self._metrics["queued"] -= 1
+            self._slots.release()
+            if batch:
+                self._batch_slots.release()
+            raise
+
+    def render(self, source, fmt, block=False):
+        return self.submit(source, fmt, block=block).result()
+
+    def _run(self, source, fmt, enqueued_at, batch=False):
+        started = time.monotonic()
+        waited = started - enqueued_at
+        with self._lock:
+            self._metrics["queued"] -= 1
+            self._metrics["running"] += 1
+            self._metrics["queue_wait_seconds_total"] += waited
+            self._metrics["queue_wait_seconds_max"] = max(
+                self._metrics["queue_wait_seconds_max"], waited
+            )
+
+        outcome = "failed"
+        try:
+            result = subprocess.run(
+                ["dot", "-Kdot", f"-T{fmt}"],
+                input=source.encode("utf-8"),
+                capture_output=True,
+                timeout=self.timeout,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(
+                    result.stderr.decode("utf-8", "replace").strip()
+                    or f"dot exited with status {result.returncode}"
+                )
+            outcome = "completed"
+            return result.stdout
+        except subprocess.TimeoutExpired:
+            outcome = "timed_out"
+            raise RenderTimeout(f"Render exceeded {self.timeout} seconds")
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._metrics["running"] -= 1
+                self._metrics[outcome] += 1
+                self._metrics["render_seconds_total"] += elapsed
+                self._metrics["render_seconds_max"] = max(
+                    self._metrics["render_seconds_max"], elapsed
+                )
+            self._slots.release()
+            if batch:
+                self._batch_slots.release()
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        finished = metrics["completed"] + metrics["failed"] + metrics["timed_out"]
+        started = finished + metrics["running"]
+        metrics.update(
+            {
+                "workers": self.workers,
+                "batch_limit": self.batch_limit,
+                "queue_size": self.queue_size,
+                "timeout_seconds": self.timeout,
+                "queue_wait_seconds_avg": (
+                    metrics["queue_wait_seconds_total"] / started if started else 0.0
+                ),
+                "render_seconds_avg": (
+                    metrics["render_seconds_total"] / finished if finished else 0.0
+                ),
+            }
+        )
+        return metrics
+
+
+render_pool = RenderPool()
+
+
+def render_usr_graph(usr_data, fmt="png", block=False):
+    """Render a USR text block to bytes in the given format.
+
+    ``json`` returns the graph structure and ``dot`` the Graphviz source, so
+    neither starts ``dot``. Other formats are piped through Graphviz on the
+    render pool, so nothing touches the filesystem.
+    """
+    if fmt == "json":
+        return json.dumps(
+            build_graph_data(usr_data), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    dot = build_usr_graph(usr_data)
+    if fmt == "dot":
+        return dot.source.encode("utf-8")
+    return render_pool.render(dot.source, fmt, block=block)
+
+
+def visualization_key(usr_data, fmt):
+    """Content address of a rendering: the USR text plus the output format."""
+    return hashlib.sha256(f"{fmt}\n{usr_data}".encode("utf-8")).hexdigest()
+
+
+class VisualizationCache:
+    """Size-bounded in-memory LRU of rendered images, with optional disk store."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get("VISUALIZATION_CACHE_MAX_BYTES", self.max_bytes)
+        self.directory = app.config.get("VISUALIZATION_CACHE_DIR") or None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.extensions["visualization_cache"] = self
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, data):
+        self._remember(key, data)
+
+        if self.directory:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first so readers never see partial files
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "directory": self.directory,
+            }
+
+
+visualization_cache = VisualizationCache()
+
+
+def get_visualization(usr_data, fmt="png"):
+    """Return ``(key, data)`` for a USR rendering, rendering only on a miss."""
+    key = visualization_key(usr_data, fmt)
+    data = visualization_cache.get(key)
+    if data is None:
+        data = render_usr_graph(usr_data, fmt)
+        visualization_cache.set(key, data)
+    return key, data
+
+
+def visualization_response(usr_data, filename, fmt="png"):
+    """Build an image response carrying an ETag, honouring If-None-Match.
+
+    The key is derived from the text alone, so a matching conditional request
+    is answered with 304 without touching the cache or Graphviz.
+    """
+    key = visualization_key(usr_data, fmt)
+    if request.if_none_match.contains(key):
+        response = make_response("", 304)
+    else:
+        try:
+            _, data = get_visualization(usr_data, fmt)
+        except RenderPoolSaturated as e:
+            response = jsonify({"msg": "Visualization service busy, retry later"})
+            response.status_code = 503
+            response.headers.set("Retry-After", str(e.retry_after))
+            return response
+        except RenderTimeout as e:
+            return jsonify({"msg": "Visualization timed out", "error": str(e)}), 504
+
+        response = make_response(data)
+        response.headers.set("Content-Type", CONTENT_TYPES[fmt])
+        if fmt != "json":
+            response.headers.set(
+                "Content-Disposition", "inline", filename=f"{filename}.{fmt}"
+            )
+
+    response.set_etag(key)
+    response.headers.set("Cache-Control", "private, no-cache")
+    return response
+
+
+class _ZipStream:
+    """Unseekable file object that hands what ZipFile writes back to a generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_visualization_zip(entries, fmt="png"):
+    """Yield a ZIP archive of USR renderings, one entry at a time.
+
+    ``entries`` is a list of ``(name, usr_data)`` pairs. Cached renderings are
+    written straight away. The rest are rendered on the render pool as batch
+    renders, keeping at most ``render_pool.batch_limit`` in flight, and each is
+    written as soon as it finishes. Failed renders are listed in errors.json.
+    """
+    compression = zipfile.ZIP_STORED if fmt == "png" else zipfile.ZIP_DEFLATED
+    stream = _ZipStream()
+    errors = []
+
+    with zipfile.ZipFile(stream, mode="w", compression=compression) as archive:
+        pending = deque()
+        for name, usr_data in entries:
+            key = visualization_key(usr_data, fmt)
+            data = visualization_cache.get(key)
+            if data is not None:
+                archive.writestr(f"{name}.{fmt}", data)
+                yield stream.drain()
+            else:
+                pending.append((name, usr_data, key))
+
+        in_flight = {}
+        while pending or in_flight:
+            while pending and len(in_flight) < render_pool.batch_limit:
+                name, usr_data, key = pending.popleft()
+                try:
+                    source = build_usr_graph(usr_data).source
+                    future = render_pool.submit(source, fmt, block=True, batch=True)
+                except Exception as e:
+                    errors.append({"name": name, "error": str(e)})
+                    continue
+                in_flight[future] = (name, key)
+
+            if not in_flight:
+                continue
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = in_flight.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    errors.append({"name": name, "error": str(e)})
+                    continue
+                visualization_cache.set(key, data)
+                archive.writestr(f"{name}.{fmt}", data)
+                yield stream.drain()
+
+        if errors:
+            archive.writestr("errors.json", json.dumps(errors, indent=2))
+
+    yield stream.drain()
@@ -18,3 +18,23 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+
+    # USR visualization cache (in-memory LRU, optional on-disk store)
+    VISUALIZATION_CACHE_MAX_BYTES = int(
+        os.getenv("VISUALIZATION_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    )
+    VISUALIZATION_CACHE_DIR = os.getenv("VISUALIZATION_CACHE_DIR")
+
+    # Graphviz render pool: concurrent renders, waiting renders, per-render timeout
+    VISUALIZATION_RENDER_WORKERS = int(os.getenv("VISUALIZATION_RENDER_WORKERS", 4))
+    VISUALIZATION_RENDER_QUEUE = int(os.getenv("VISUALIZATION_RENDER_QUEUE", 16))
+    VISUALIZATION_RENDER_TIMEOUT = float(os.getenv("VISUALIZATION_RENDER_TIMEOUT", 10))
+
+    # Bulk USR import: blocks written per transaction
+    USR_IMPORT_CHUNK_SIZE = int(os.getenv("USR_IMPORT_CHUNK_SIZE", 500))
+    # Processes parsing USR blocks during bulk imports (1 parses in-process)
+    USR_IMPORT_WORKERS = int(os.getenv("USR_IMPORT_WORKERS", 1))
+
+    # Background jobs: threads running them, directory for uploads and outputs
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR")
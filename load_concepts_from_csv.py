@@ -1,6 +1,13 @@
-import csv
+"""Load the concept dictionary from a CSV file.
+
+Concepts are upserted on concept_label in chunks, one commit per chunk; see
+app/concept_loader.py. --copy uses PostgreSQL's COPY instead.
+
+Usage: python load_concepts_from_csv.py <path_to_csv> [--chunk-size N] [--copy]
+"""
+
+import argparse
 import sys
-import os
 from pathlib import Path
 
 # Add the backend directory to Python path
@@ -10,40 +17,38 @@ if backend_dir not in sys.path:
 
 from app import create_app
 from app.extensions import db
+from app.concept_loader import CONCEPT_LOAD_CHUNK_SIZE, copy_concepts, load_concepts
+
 
-# Use the correct import based on where your Concept model is defined
-try:
-    from app.models import Concept  # Try this first
-except ImportError:
-    from models import Concept  # Fallback to this if the above fails
+def print_progress(rows, seconds):
+    rate = rows / seconds if seconds else rows
+    print(f"{rows} rows loaded ({rate:.0f} rows/s)")
 
 
-def load_concepts(csv_path):
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path")
+    parser.add_argument("--chunk-size", type=int, default=CONCEPT_LOAD_CHUNK_SIZE)
+    parser.add_argument(
+        "--copy", action="store_true", help="load with COPY (PostgreSQL only)"
+    )
+    args = parser.parse_args()
+
     app = create_app()
     with app.app_context():
-        with open(csv_path, mode="r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                # Skip if concept already exists
-                if Concept.query.filter_by(concept_label=row["concept_label"]).first():
-                    continue
-
-                concept = Concept(
-                    concept_label=row["concept_label"],
-                    hindi_label=row.get("hindi_label", ""),
-                    sanskrit_label=row.get("sanskrit_label", ""),
-                    english_label=row.get("english_label", ""),
-                    mrsc=row.get("mrsc", ""),
-                )
-                db.session.add(concept)
-
-            db.session.commit()
-            print(f"Successfully loaded concepts from {csv_path}")
+        if args.copy and db.engine.dialect.name != "postgresql":
+            parser.error("--copy needs a PostgreSQL database")
+        with open(args.csv_path, mode="r", encoding="utf-8", newline="") as csvfile:
+            if args.copy:
+                stats = copy_concepts(csvfile)
+            else:
+                stats = load_concepts(csvfile, args.chunk_size, print_progress)
 
+    print(
+        f"Successfully loaded {stats['rows']} concepts from {args.csv_path} "
+        f"in {stats['seconds']}s ({stats['rows_per_second']} rows/s)"
+    )
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python load_concepts_from_csv.py <path_to_csv>")
-        sys.exit(1)
 
-    load_concepts(sys.argv[1])
+if __name__ == "__main__":
+    main()
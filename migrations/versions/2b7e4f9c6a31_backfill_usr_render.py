@@ -0,0 +1,130 @@
+"""Backfill USR rendered text
+
+Revision ID: 2b7e4f9c6a31
+Revises: 9a3c5e7f1b26
+Create Date: 2026-10-18 21:48:03.115902
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7e4f9c6a31'
+down_revision = '9a3c5e7f1b26'
+branch_labels = None
+depends_on = None
+
+LAYER_TABLES = [
+    'lexical_info',
+    'dependency_info',
+    'discourse_coref_info',
+    'construction_info',
+    'sentence_type_info',
+]
+BATCH_SIZE = 500
+
+
+# The renderer as of this revision (app.usr_format.render_usr_rows and
+# wrap_usr_rows), copied so that later changes to it leave this migration
+# alone
+def _group_relations(rows, head_col, label_col):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['index'], []).append(
+            f"{row[head_col]}:{row[label_col]}"
+        )
+    return {index: ' '.join(pairs) for index, pairs in grouped.items()}
+
+
+def _render_rows(lexical, dependency, discourse, construction, sentence_type):
+    dependencies = _group_relations(dependency, 'head_index', 'relation')
+    discourses = _group_relations(discourse, 'head_index', 'relation')
+    constructions = _group_relations(construction, 'cxn_index', 'component_type')
+    scope = sentence_type[0]['scope'] if sentence_type else None
+
+    lines = []
+    for li in sorted(lexical, key=lambda row: row['index']):
+        index = li['index']
+        lines.append('\t'.join([
+            li['concept'] or '-',
+            str(index) if index is not None else '-',
+            li['semantic_category'] or '-',
+            li['morpho_semantic'] or '-',
+            dependencies.get(index) or '-',
+            discourses.get(index) or '-',
+            li['speakers_view'] or '-',
+            scope or '-',
+            constructions.get(index) or '-',
+        ]))
+    if scope and scope != 'neutral':
+        lines.append(f"%{scope}")
+    return '\n'.join(lines)
+
+
+def _content_hash(rendered, segment_label, segment_text):
+    lines = [f"<segment_id={segment_label}>", f"#{segment_text}"]
+    if rendered:
+        lines.append(rendered)
+    lines.append('</segment_id>')
+    return hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    # Render USRs stored without their text, so that readers never fall back
+    # to loading the layers of each USR one at a time
+    bind = op.get_bind()
+    metadata = sa.MetaData()
+    usr = sa.Table('usr', metadata, autoload_with=bind)
+    segment = sa.Table('segment', metadata, autoload_with=bind)
+    layers = [sa.Table(name, metadata, autoload_with=bind) for name in LAYER_TABLES]
+
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(usr.c.id, segment.c.segment_id, segment.c.text)
+            .select_from(usr.outerjoin(segment, usr.c.segment_id == segment.c.id))
+            .where(usr.c.id > last_id, usr.c.rendered_text.is_(None))
+            .order_by(usr.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        usr_ids = [row.id for row in batch]
+
+        rows = {usr_id: [[] for _ in layers] for usr_id in usr_ids}
+        for i, table in enumerate(layers):
+            for row in bind.execute(
+                sa.select(table)
+                .where(table.c.usr_id.in_(usr_ids))
+                .order_by(table.c.id)
+            ):
+                rows[row.usr_id][i].append(row._mapping)
+
+        values = []
+        for row in batch:
+            rendered = _render_rows(*rows[row.id])
+            values.append(
+                {
+                    'usr_id': row.id,
+                    'rendered_text': rendered,
+                    'content_hash': _content_hash(rendered, row.segment_id, row.text),
+                }
+            )
+        bind.execute(
+            usr.update()
+            .where(usr.c.id == sa.bindparam('usr_id'))
+            .values(
+                rendered_text=sa.bindparam('rendered_text'),
+                content_hash=sa.bindparam('content_hash'),
+            ),
+            values,
+        )
+        last_id = usr_ids[-1]
+
+
+def downgrade():
+    # Rendered text written since cannot be told apart; keep it
+    pass
@@ -0,0 +1,71 @@
+"""Fill in USR.rendered_text and USR.content_hash for existing USRs.
+
+The 2b7e4f9c6a31 migration backfills USRs that have no rendering on upgrade.
+This script is for re-rendering with --all, e.g. after the renderer changes.
+
+Usage: python scripts/backfill_usr_render.py [--all] [--batch-size N]
+"""
+
+import argparse
+import os
+import sys
+
+# Make sure the app package is discoverable, just like in run.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy.orm import selectinload
+
+from app import create_app
+from app.extensions import db
+from app.models import USR
+from app.queries import usr_layer_loaders
+from app.usr_format import render_usr_rows, wrap_usr_rows, hash_usr_text
+
+
+def backfill(rerender_all=False, batch_size=500):
+    app = create_app()
+    with app.app_context():
+        last_id = 0
+        updated = 0
+        while True:
+            query = USR.query.options(
+                selectinload(USR.segment), *usr_layer_loaders()
+            ).filter(USR.id > last_id)
+            if not rerender_all:
+                query = query.filter(USR.rendered_text.is_(None))
+            usrs = query.order_by(USR.id).limit(batch_size).all()
+            if not usrs:
+                break
+
+            for usr in usrs:
+                usr.rendered_text = "\n".join(
+                    render_usr_rows(
+                        usr.lexical_info,
+                        usr.dependency_info,
+                        usr.discourse_coref_info,
+                        usr.construction_info,
+                        usr.sentence_type_info,
+                    )
+                )
+                usr.content_hash = hash_usr_text(
+                    wrap_usr_rows(usr.rendered_text, usr.segment)
+                )
+
+            last_id = usrs[-1].id
+            updated += len(usrs)
+            db.session.commit()
+            db.session.expunge_all()
+            print(f"Rendered {updated} USRs")
+
+        print(f"Done: {updated} USRs rendered")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--all", action="store_true", help="re-render USRs that already have text"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    backfill(rerender_all=args.all, batch_size=args.batch_size)
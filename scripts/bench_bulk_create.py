@@ -0,0 +1,126 @@
+"""Benchmark bulk sentence and segment creation.
+
+Compares the per-row add + flush that create_sentence / create_segment used
+to do against app.bulk_import.insert_returning_ids. Every run is rolled back.
+By default a throwaway SQLite database is used; pass --database-url to
+measure against PostgreSQL, where the INSERT ... RETURNING is batched.
+
+Usage: python scripts/bench_bulk_create.py [--rows N] [--database-url URL]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Make sure the app package is discoverable, just like in run.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SIZES = [100, 500, 2000]
+
+
+def legacy_create(model, rows):
+    """The add + flush per row the routes did before."""
+    ids = []
+    for row in rows:
+        obj = model(**row)
+        db.session.add(obj)
+        db.session.flush()
+        ids.append(obj.id)
+    return ids
+
+
+def timed(fn, model, rows):
+    start = time.perf_counter()
+    ids = fn(model, rows)
+    elapsed = time.perf_counter() - start
+    assert len(ids) == len(rows)
+    db.session.rollback()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, action="append", help="batch size(s)")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir.name}/bench.sqlite"
+
+    global db
+    from app import create_app
+    from app.bulk_import import insert_returning_ids
+    from app.extensions import db
+    from app.models import Project, Chapter, Sentence, Segment
+
+    app = create_app()
+    with app.app_context():
+        if tmpdir:
+            db.create_all()
+
+        project = Project(title="bench")
+        db.session.add(project)
+        db.session.flush()
+        chapter = Chapter(project_id=project.id, title="bench")
+        db.session.add(chapter)
+        db.session.flush()
+        sentence = Sentence(chapter_id=chapter.id, text="bench")
+        db.session.add(sentence)
+        db.session.commit()
+
+        print(f"database: {db.engine.dialect.name}")
+        print(
+            f"{'table':>8}  {'rows':>6}  {'flush rows/s':>12}  "
+            f"{'bulk rows/s':>12}  {'speedup':>8}"
+        )
+        for size in args.rows or SIZES:
+            cases = [
+                (
+                    Sentence,
+                    [
+                        {
+                            "chapter_id": chapter.id,
+                            "text": f"s{i}",
+                            "sentence_id": f"S{i}",
+                        }
+                        for i in range(size)
+                    ],
+                ),
+                (
+                    Segment,
+                    [
+                        {
+                            "sentence_id": sentence.id,
+                            "segment_id": f"G{i}",
+                            "text": f"segment {i}",
+                            "wxtext": f"wx {i}",
+                            "englishtext": f"english {i}",
+                        }
+                        for i in range(size)
+                    ],
+                ),
+            ]
+            for model, rows in cases:
+                legacy = timed(legacy_create, model, rows)
+                bulk = timed(insert_returning_ids, model, rows)
+                print(
+                    f"{model.__tablename__:>8}  {size:>6}  {size / legacy:>12.0f}  "
+                    f"{size / bulk:>12.0f}  {legacy / bulk:>7.1f}x"
+                )
+
+        # Leave no trace in a real database
+        db.session.delete(project)
+        db.session.commit()
+
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark parallel parsing of USR corpus files.
+
+Parses a synthetic corpus with app.bulk_import.parse_usr_blocks using 1, 2,
+4 and 8 worker processes and checks every run yields the same results in the
+same order. Each pool is started before its run is timed, so the timings
+leave out process start-up. No database is needed.
+
+Usage: python scripts/bench_usr_import_parsing.py [--blocks N] [--concepts N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+# Make sure the app package is discoverable, just like in run.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.bulk_import import USR_PARSE_BATCH_SIZE, parse_usr_blocks
+from app.usr_format import iter_usr_blocks
+
+WORKERS = [1, 2, 4, 8]
+
+
+def synthetic_corpus(blocks, concepts):
+    out = io.StringIO()
+    for b in range(blocks):
+        out.write(f"<segment_id=Bench_{b:06d}>\n#synthetic segment {b}\n")
+        for i in range(1, concepts + 1):
+            out.write(
+                "\t".join(
+                    [
+                        f"concept_{i}",
+                        str(i),
+                        "anim" if i % 3 == 0 else "-",
+                        "-",
+                        f"{i // 2}:k1" if i > 1 else "0:main",
+                        "-",
+                        "def" if i % 5 == 0 else "-",
+                        "-",
+                        f"{concepts + 1}:op{i}" if i % 4 == 0 else "-",
+                    ]
+                )
+                + "\n"
+            )
+        out.write("%affirmative\n</segment_id>\n")
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--concepts", type=int, default=12)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.blocks, args.concepts)
+    print(
+        f"{args.blocks} blocks x {args.concepts} concepts "
+        f"({len(corpus) / 2**20:.1f} MiB), {os.cpu_count()} CPUs"
+    )
+    print(f"{'workers':>7}  {'seconds':>8}  {'blocks/s':>10}  {'speedup':>8}")
+
+    # Enough blocks for every worker of a pool to parse a batch
+    warm_up = synthetic_corpus(max(WORKERS) * 2 * USR_PARSE_BATCH_SIZE, 1)
+
+    baseline = expected = None
+    for workers in WORKERS:
+        for _ in parse_usr_blocks(iter_usr_blocks(io.StringIO(warm_up)), workers):
+            pass
+
+        start = time.perf_counter()
+        results = [
+            (block.number, parsed, error)
+            for block, parsed, error in parse_usr_blocks(
+                iter_usr_blocks(io.StringIO(corpus)), workers
+            )
+        ]
+        elapsed = time.perf_counter() - start
+
+        if expected is None:
+            baseline, expected = elapsed, results
+        assert results == expected, f"{workers} workers changed the results"
+
+        print(
+            f"{workers:>7}  {elapsed:>8.2f}  {args.blocks / elapsed:>10.0f}  "
+            f"{baseline / elapsed:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Micro-benchmark for the 9-column USR renderer.
+
+Compares app.usr_format.render_usr_rows against the previous per-row rescan
+on synthetic USRs of increasing size. No database is needed.
+
+Usage: python scripts/bench_usr_renderer.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+# Make sure the app package is discoverable, just like in run.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.usr_format import render_usr_rows
+
+SIZES = [10, 100, 500, 2000]
+
+
+def synthetic_usr(concepts):
+    lexical, dependency, discourse, construction = [], [], [], []
+    for i in range(1, concepts + 1):
+        lexical.append(
+            SimpleNamespace(
+                concept=f"concept_{i}",
+                index=i,
+                semantic_category="anim" if i % 3 == 0 else None,
+                morpho_semantic=None,
+                speakers_view="def" if i % 5 == 0 else None,
+            )
+        )
+        dependency.append(
+            SimpleNamespace(index=i, head_index=str(i // 2), relation="k1")
+        )
+        discourse.append(SimpleNamespace(index=i, head_index=None, relation="-"))
+        construction.append(
+            SimpleNamespace(index=i, cxn_index=str(i + 1), component_type="op1")
+        )
+    sentence_type = [SimpleNamespace(scope="affirmative")]
+    return lexical, dependency, discourse, construction, sentence_type
+
+
+def legacy_render_rows(lexical, dependency, discourse, construction, sentence_type):
+    """The per-row rescan the routes used before the shared renderer."""
+    lines = []
+    for li in sorted(lexical, key=lambda x: x.index):
+        line_parts = [
+            li.concept or "-",
+            str(li.index) if li.index is not None else "-",
+            li.semantic_category if li.semantic_category else "-",
+            li.morpho_semantic if li.morpho_semantic else "-",
+            " ".join(
+                [
+                    f"{di.head_index}:{di.relation}"
+                    for di in sorted(dependency, key=lambda x: x.index)
+                    if di.index == li.index
+                ]
+            )
+            or "-",
+            " ".join(
+                [
+                    f"{dci.head_index}:{dci.relation}"
+                    for dci in sorted(discourse, key=lambda x: x.index)
+                    if dci.index == li.index
+                ]
+            )
+            or "-",
+            li.speakers_view if li.speakers_view else "-",
+            (
+                sentence_type[0].scope
+                if sentence_type and sentence_type[0].scope
+                else "-"
+            ),
+            " ".join(
+                [
+                    f"{ci.cxn_index}:{ci.component_type}"
+                    for ci in sorted(construction, key=lambda x: x.index)
+                    if ci.index == li.index
+                ]
+            )
+            or "-",
+        ]
+        lines.append("\t".join(line_parts))
+    if sentence_type and sentence_type[0].scope != "neutral":
+        lines.append(f"%{sentence_type[0].scope}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'concepts':>8}  {'legacy ms':>10}  {'shared ms':>10}  {'speedup':>8}")
+    for size in SIZES:
+        layers = synthetic_usr(size)
+        assert legacy_render_rows(*layers) == render_usr_rows(*layers)
+
+        number = max(1, 2000 // size)
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_render_rows(*layers), number=number, repeat=args.repeat
+            )
+        )
+        shared = min(
+            timeit.repeat(
+                lambda: render_usr_rows(*layers), number=number, repeat=args.repeat
+            )
+        )
+        print(
+            f"{size:>8}  {legacy / number * 1000:>10.3f}  "
+            f"{shared / number * 1000:>10.3f}  {legacy / shared:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Check that the hierarchy and segment-USR reads use a fixed number of queries.
+
+Builds corpora of increasing size in a throwaway SQLite database, calls the
+admin read endpoints and counts the SELECTs each one issues. The counts must
+not change as the corpus grows.
+
+Usage: python scripts/check_query_counts.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Make sure the app package is discoverable, just like in run.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ.setdefault("SECRET_KEY", "query-count-check")
+os.environ.setdefault("SECURITY_PASSWORD_SALT", "query-count-check")
+os.environ.setdefault("JWT_SECRET_KEY", "query-count-check-jwt-secret-key-000000")
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    User,
+    Project,
+    Chapter,
+    Sentence,
+    Segment,
+    USR,
+    LexicalInfo,
+    DependencyInfo,
+    DiscourseCorefInfo,
+    ConstructionInfo,
+    SentenceTypeInfo,
+)
+
+SIZES = [(1, 1, 1), (2, 3, 2), (4, 6, 4)]  # chapters, sentences, segments
+
+
+def build_corpus(chapters, sentences, segments):
+    project = Project(title=f"corpus-{chapters}x{sentences}x{segments}")
+    db.session.add(project)
+    for c in range(chapters):
+        chapter = Chapter(project=project, title=f"chapter {c}")
+        for s in range(sentences):
+            sentence = Sentence(chapter=chapter, text=f"sentence {s}")
+            for g in range(segments):
+                segment = Segment(
+                    sentence=sentence, text="a b c", segment_id=f"{c}_{s}_{g}"
+                )
+                usr = USR(segment=segment, sentence_type="affirmative")
+                for i in range(1, 4):
+                    usr.lexical_info.append(LexicalInfo(concept=f"c_{i}", index=i))
+                    usr.dependency_info.append(
+                        DependencyInfo(
+                            concept=f"c_{i}", index=i, head_index="0", relation="main"
+                        )
+                    )
+                    usr.discourse_coref_info.append(
+                        DiscourseCorefInfo(concept=f"c_{i}", index=i, relation="-")
+                    )
+                    usr.construction_info.append(
+                        ConstructionInfo(concept=f"c_{i}", index=i, component_type="-")
+                    )
+                usr.sentence_type_info.append(
+                    SentenceTypeInfo(sentence_type="affirmative", scope="neutral")
+                )
+                db.session.add(usr)
+    db.session.commit()
+    return project
+
+
+def count_queries(client, headers, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, headers=headers)
+        # Drain streamed bodies while the listener is still attached
+        response.get_data()
+        assert response.status_code == 200, response.data
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        admin = User(
+            name="admin", email="admin@example.com", role="admin", status="approved"
+        )
+        admin.set_password("admin")
+        db.session.add(admin)
+        db.session.commit()
+        headers = {
+            "Authorization": f"Bearer {create_access_token(identity=admin.email)}"
+        }
+
+        counts = {}
+        for size in SIZES:
+            project = build_corpus(*size)
+            segment = project.chapters[0].sentences[0].segments[0]
+            usr_id = segment.usrs[0].id
+            db.session.expire_all()
+
+            client = app.test_client()
+            counts[size] = {
+                "hierarchy": count_queries(
+                    client, headers, f"/api/admin/project/{project.id}/hierarchy"
+                ),
+                "hierarchy_ndjson": count_queries(
+                    client,
+                    headers,
+                    f"/api/admin/project/{project.id}/hierarchy?stream=ndjson",
+                ),
+                "segment_usrs": count_queries(
+                    client, headers, f"/api/admin/segment/{segment.id}/usrs"
+                ),
+                "usr": count_queries(client, headers, f"/api/admin/usr/{usr_id}"),
+            }
+            print(size, counts[size])
+
+    os.unlink(_db_file.name)
+
+    baseline = counts[SIZES[0]]
+    for size, result in counts.items():
+        assert (
+            result == baseline
+        ), f"query count changed for {size}: {result} != {baseline}"
+    print("OK: query counts are independent of corpus size")
+
+
+if __name__ == "__main__":
+    main()
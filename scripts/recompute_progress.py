@@ -0,0 +1,40 @@
+"""Rebuild the denormalized project and chapter progress counters.
+
+The counters are kept up to date by the routes; run this after upgrading, or
+to repair them after changing the database by hand.
+
+Usage: python scripts/recompute_progress.py [--project ID ...]
+"""
+
+import argparse
+import os
+import sys
+
+# Make sure the app package is discoverable, just like in run.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from app.extensions import db
+from app.progress import recompute_all_progress, recompute_projects_progress
+
+
+def recompute(project_ids=None):
+    app = create_app()
+    with app.app_context():
+        if project_ids:
+            recompute_projects_progress(project_ids)
+            count = len(project_ids)
+        else:
+            count = recompute_all_progress()
+        db.session.commit()
+        print(f"Done: progress recomputed for {count} projects")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--project", type=int, action="append", help="only recompute this project"
+    )
+    args = parser.parse_args()
+
+    recompute(args.project)